@@ -0,0 +1,48 @@
+"""progress_user_lesson_unique
+
+Revision ID: 3c7a1f2e9b44
+Revises: 0ea9e74adc7f
+Create Date: 2026-10-18 10:12:41.503918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c7a1f2e9b44'
+down_revision: Union[str, None] = '0ea9e74adc7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Merge duplicate (user_id, lesson_id) rows left by concurrent heartbeats:
+    # keep the row with the most watched time, completed if any duplicate was.
+    op.execute("""
+        UPDATE progress SET is_completed = TRUE
+        WHERE EXISTS (
+            SELECT 1 FROM progress other
+            WHERE other.user_id = progress.user_id
+              AND other.lesson_id = progress.lesson_id
+              AND other.is_completed
+        )
+    """)
+    op.execute("""
+        DELETE FROM progress
+        WHERE EXISTS (
+            SELECT 1 FROM progress other
+            WHERE other.user_id = progress.user_id
+              AND other.lesson_id = progress.lesson_id
+              AND (COALESCE(other.watched_duration, 0) > COALESCE(progress.watched_duration, 0)
+                   OR (COALESCE(other.watched_duration, 0) = COALESCE(progress.watched_duration, 0)
+                       AND other.id > progress.id))
+        )
+    """)
+    op.create_unique_constraint('uq_progress_user_lesson', 'progress', ['user_id', 'lesson_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_progress_user_lesson', 'progress', type_='unique')
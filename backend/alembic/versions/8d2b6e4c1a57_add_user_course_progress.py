@@ -0,0 +1,52 @@
+"""add_user_course_progress
+
+Revision ID: 8d2b6e4c1a57
+Revises: 3c7a1f2e9b44
+Create Date: 2026-10-18 13:05:17.284611
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2b6e4c1a57'
+down_revision: Union[str, None] = '3c7a1f2e9b44'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_course_progress',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('course_id', sa.Integer(), nullable=False),
+    sa.Column('watched_duration', sa.Integer(), nullable=False),
+    sa.Column('completed_lessons', sa.Integer(), nullable=False),
+    sa.Column('last_activity_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'course_id')
+    )
+    # Backfill from existing progress (same rules as scripts/rebuild_progress_summary.py)
+    op.execute("""
+        INSERT INTO user_course_progress (user_id, course_id, watched_duration, completed_lessons, last_activity_at)
+        SELECT p.user_id,
+               m.course_id,
+               SUM(CASE WHEN COALESCE(l.video_duration, 0) > 0
+                        THEN LEAST(COALESCE(p.watched_duration, 0), l.video_duration)
+                        ELSE COALESCE(p.watched_duration, 0) END),
+               SUM(CASE WHEN COALESCE(l.video_duration, 0) > 0
+                         AND 10 * LEAST(COALESCE(p.watched_duration, 0), l.video_duration) >= 9 * l.video_duration
+                        THEN 1 ELSE 0 END),
+               MAX(p.last_watched_at)
+        FROM progress p
+        JOIN course_lessons l ON l.id = p.lesson_id
+        JOIN course_modules m ON m.id = l.module_id
+        GROUP BY p.user_id, m.course_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_course_progress')
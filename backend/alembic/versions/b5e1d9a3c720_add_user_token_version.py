@@ -0,0 +1,26 @@
+"""add_user_token_version
+
+Revision ID: b5e1d9a3c720
+Revises: 8d2b6e4c1a57
+Create Date: 2026-10-18 14:12:40.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5e1d9a3c720'
+down_revision: Union[str, None] = '8d2b6e4c1a57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('token_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'token_version')
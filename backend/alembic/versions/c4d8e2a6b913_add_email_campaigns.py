@@ -0,0 +1,44 @@
+"""add_email_campaigns
+
+Revision ID: c4d8e2a6b913
+Revises: a7c31d5e2f60
+Create Date: 2026-10-18 21:05:47.310264
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4d8e2a6b913'
+down_revision: Union[str, None] = 'a7c31d5e2f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('email_campaigns',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('subject', sa.String(), nullable=False),
+    sa.Column('html_template', sa.Text(), nullable=False),
+    sa.Column('text_template', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('last_user_id', sa.Integer(), nullable=False),
+    sa.Column('sent', sa.Integer(), nullable=False),
+    sa.Column('deferred', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_email_campaigns_id'), 'email_campaigns', ['id'], unique=False)
+    op.create_index(op.f('ix_email_campaigns_name'), 'email_campaigns', ['name'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_email_campaigns_name'), table_name='email_campaigns')
+    op.drop_index(op.f('ix_email_campaigns_id'), table_name='email_campaigns')
+    op.drop_table('email_campaigns')
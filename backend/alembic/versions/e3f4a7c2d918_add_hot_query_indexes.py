@@ -0,0 +1,49 @@
+"""add_hot_query_indexes
+
+Revision ID: e3f4a7c2d918
+Revises: b5e1d9a3c720
+Create Date: 2026-10-18 15:02:11.730946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3f4a7c2d918'
+down_revision: Union[str, None] = 'b5e1d9a3c720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# progress (user_id, lesson_id) is already covered by uq_progress_user_lesson,
+# user_course_progress by its (user_id, course_id) primary key.
+INDEXES = [
+    ('ix_course_modules_course_id_order', 'course_modules', ['course_id', 'order']),
+    ('ix_course_lessons_module_id_order', 'course_lessons', ['module_id', 'order']),
+    ('ix_course_resources_course_id_order', 'course_resources', ['course_id', 'order']),
+    ('ix_password_reset_tokens_user_id', 'password_reset_tokens', ['user_id']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction; on Postgres it
+    # doesn't block writes to tables that are already in use
+    # course_resources comes from create_all (scripts/init_db.py), the
+    # add_course_resources migration is empty, so it may not exist here
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            if table not in tables:
+                continue
+            op.create_index(name, table, columns, unique=False, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    tables = set(sa.inspect(op.get_bind()).get_table_names())
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            if table not in tables:
+                continue
+            op.drop_index(name, table_name=table, if_exists=True, postgresql_concurrently=True)
@@ -1,26 +1,29 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import decode_access_token
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.security import decode_access_token, has_profile_claims
 from app.models.user import User
+from app.schemas.user import UserResponse
+from app.services.principal_cache import Principal, cache_principal, get_cached_principal
+from app.services.token_revocation import is_token_revoked
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+
+async def get_token_payload(token: str = Depends(oauth2_scheme)) -> dict:
     import logging
     logger = logging.getLogger(__name__)
     
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    
     # Логируем для отладки
     logger.debug(f"Validating token: {token[:20]}..." if token else "No token provided")
     
@@ -28,6 +31,15 @@ async def get_current_user(
     if payload is None:
         logger.warning(f"Failed to decode token: {token[:20] if token else 'None'}...")
         raise credentials_exception
+    return payload
+
+
+async def get_current_user(
+    payload: dict = Depends(get_token_payload),
+    db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    import logging
+    logger = logging.getLogger(__name__)
     
     # "sub" должен быть строкой согласно JWT стандарту, конвертируем в int
     user_id_str = payload.get("sub")
@@ -41,11 +53,27 @@ async def get_current_user(
         logger.warning(f"Invalid user_id in token: {user_id_str} (type: {type(user_id_str)})")
         raise credentials_exception
     
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
-        logger.warning(f"User not found with ID: {user_id}")
+    token_version = payload.get("ver", 0)
+    if is_token_revoked(user_id, token_version):
+        logger.warning(f"Revoked token for user {user_id} (version {token_version})")
         raise credentials_exception
     
+    if settings.ACCESS_TOKEN_EMBED_PROFILE and has_profile_claims(payload):
+        # Быстрый путь: всё нужное есть в токене, в БД не ходим
+        user = Principal.from_claims(user_id, payload)
+    else:
+        user = get_cached_principal(user_id)
+        if user is None:
+            result = await db.execute(select(User).where(User.id == user_id))
+            user_row = result.scalar_one_or_none()
+            if user_row is None:
+                logger.warning(f"User not found with ID: {user_id}")
+                raise credentials_exception
+            user = cache_principal(user_row)
+        if token_version < user.token_version:
+            logger.warning(f"Outdated token for user {user_id} (version {token_version})")
+            raise credentials_exception
+    
     if not user.is_active:
         logger.warning(f"User {user_id} is inactive")
         raise HTTPException(
@@ -56,3 +84,26 @@ async def get_current_user(
     logger.debug(f"User authenticated: {user.email} (ID: {user.id})")
     return user
 
+
+async def get_current_profile(
+    payload: dict = Depends(get_token_payload),
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+) -> UserResponse:
+    """Profile for /me: from the token claims when present, otherwise from the users row"""
+    if settings.ACCESS_TOKEN_EMBED_PROFILE and has_profile_claims(payload):
+        try:
+            return UserResponse(
+                id=current_user.id,
+                email=payload["email"],
+                username=payload["username"],
+                full_name=payload.get("name"),
+                is_active=payload["active"],
+                created_at=payload["created"],
+            )
+        except ValidationError:
+            pass
+    user = await db.get(User, current_user.id)
+    if user is None:
+        raise credentials_exception
+    return UserResponse.model_validate(user)
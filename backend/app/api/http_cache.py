@@ -0,0 +1,29 @@
+from typing import Optional
+from starlette.requests import Request
+from starlette.responses import Response
+from app.core.config import settings
+from app.services.course_cache import CachedBody
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison (RFC 9110 §13.1.2): W/"x" matches "x"
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def cache_control(private: bool) -> str:
+    scope = "private" if private else "public"
+    return (
+        f"{scope}, max-age={settings.COURSE_HTTP_MAX_AGE}, "
+        f"stale-while-revalidate={settings.COURSE_HTTP_STALE_WHILE_REVALIDATE}"
+    )
+
+
+def conditional_json_response(request: Request, entry: CachedBody, private: bool = False) -> Response:
+    """Return 304 if the client already has this ETag, otherwise the JSON body."""
+    headers = {"ETag": entry.etag, "Cache-Control": cache_control(private)}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
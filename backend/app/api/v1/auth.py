@@ -1,15 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request
 from fastapi.responses import RedirectResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime, timedelta, timezone
 import secrets
 import urllib.parse
-from app.core.database import get_db
-from app.core.security import get_password_hash, create_access_token
+import httpx
+from app.core.database import get_async_db
+from app.core.security import get_password_hash_async, create_user_access_token
 from app.core.config import settings
-from app.core.email import send_email, get_password_reset_email_html, get_password_reset_email_text
+from app.core.email import get_password_reset_email_html, get_password_reset_email_text
+from app.core.http_client import get_http_client
 from app.models.user import User
 from app.models.password_reset import PasswordResetToken
+from app.services.email_outbox import email_outbox, enqueue_email
+from app.services.principal_cache import invalidate_principal
 from app.schemas.user import ForgotPasswordRequest, ResetPasswordRequest, Token
 import logging
 
@@ -54,7 +59,7 @@ async def google_auth():
 @router.post("/google/callback")
 async def google_callback(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Handle Google OAuth callback (called from frontend).
@@ -78,89 +83,98 @@ async def google_callback(
     
     try:
         # Exchange code for token (redirect_uri is frontend URL since Google redirects there)
-        import httpx as httpx_lib
-        async with httpx_lib.AsyncClient() as client:
-            token_response = await client.post(
-                "https://oauth2.googleapis.com/token",
-                data={
-                    "code": code,
-                    "client_id": settings.GOOGLE_CLIENT_ID,
-                    "client_secret": settings.GOOGLE_CLIENT_SECRET,
-                    "redirect_uri": f"{settings.FRONTEND_URL}/auth/google/callback",
-                    "grant_type": "authorization_code",
-                }
+        client = get_http_client()
+        token_response = await client.post(
+            settings.GOOGLE_TOKEN_URL,
+            data={
+                "code": code,
+                "client_id": settings.GOOGLE_CLIENT_ID,
+                "client_secret": settings.GOOGLE_CLIENT_SECRET,
+                "redirect_uri": f"{settings.FRONTEND_URL}/auth/google/callback",
+                "grant_type": "authorization_code",
+            }
+        )
+        token_data = token_response.json()
+        
+        if "error" in token_data:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"OAuth error: {token_data.get('error_description', 'Unknown error')}"
             )
-            token_data = token_response.json()
-            
-            if "error" in token_data:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"OAuth error: {token_data.get('error_description', 'Unknown error')}"
-                )
-            
-            access_token = token_data["access_token"]
-            
-            # Get user info from Google
-            user_info_response = await client.get(
-                "https://www.googleapis.com/oauth2/v2/userinfo",
-                headers={"Authorization": f"Bearer {access_token}"}
+        
+        access_token = token_data["access_token"]
+        
+        # Get user info from Google
+        user_info_response = await client.get(
+            settings.GOOGLE_USERINFO_URL,
+            headers={"Authorization": f"Bearer {access_token}"}
+        )
+        user_info = user_info_response.json()
+        
+        google_id = user_info.get("id")
+        email = user_info.get("email")
+        full_name = user_info.get("name", "")
+        picture = user_info.get("picture", "")
+        
+        if not google_id or not email:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Failed to get user information from Google"
             )
-            user_info = user_info_response.json()
-            
-            google_id = user_info.get("id")
-            email = user_info.get("email")
-            full_name = user_info.get("name", "")
-            picture = user_info.get("picture", "")
-            
-            if not google_id or not email:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Failed to get user information from Google"
-                )
+        
+        # Find or create user
+        result = await db.execute(select(User).where(
+            (User.google_id == google_id) | (User.email == email)
+        ))
+        user = result.scalars().first()
+        
+        if user:
+            # Update existing user
+            if not user.google_id:
+                user.google_id = google_id
+                user.auth_provider = "google"
+                if not user.full_name and full_name:
+                    user.full_name = full_name
+            await db.commit()
+            invalidate_principal(user.id)
+            await db.refresh(user)
+        else:
+            # Create new user (username from email)
+            username_base = email.split("@")[0]
+            username = username_base
+            counter = 1
+            while await db.scalar(select(User.id).where(User.username == username)):
+                username = f"{username_base}{counter}"
+                counter += 1
             
-            # Find or create user
-            user = db.query(User).filter(
-                (User.google_id == google_id) | (User.email == email)
-            ).first()
-            
-            if user:
-                # Update existing user
-                if not user.google_id:
-                    user.google_id = google_id
-                    user.auth_provider = "google"
-                    if not user.full_name and full_name:
-                        user.full_name = full_name
-                db.commit()
-                db.refresh(user)
-            else:
-                # Create new user (username from email)
-                username_base = email.split("@")[0]
-                username = username_base
-                counter = 1
-                while db.query(User).filter(User.username == username).first():
-                    username = f"{username_base}{counter}"
-                    counter += 1
-                
-                user = User(
-                    email=email,
-                    username=username,
-                    google_id=google_id,
-                    auth_provider="google",
-                    full_name=full_name,
-                    hashed_password=None,  # OAuth users have no password
-                    is_active=True
-                )
-                db.add(user)
-                db.commit()
-                db.refresh(user)
-            
-            # Create JWT token and return to frontend
-            access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-            jwt_token = create_access_token(
-                data={"sub": str(user.id)}, expires_delta=access_token_expires
+            user = User(
+                email=email,
+                username=username,
+                google_id=google_id,
+                auth_provider="google",
+                full_name=full_name,
+                hashed_password=None,  # OAuth users have no password
+                is_active=True
             )
-            return {"access_token": jwt_token, "token_type": "bearer"}
-            
+            db.add(user)
+            await db.commit()
+            await db.refresh(user)
+        
+        # Create JWT token and return to frontend
+        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        jwt_token = create_user_access_token(
+            user, expires_delta=access_token_expires
+        )
+        return {"access_token": jwt_token, "token_type": "bearer"}
+        
+    except HTTPException:
+        raise
+    except httpx.TimeoutException as e:
+        logger.error(f"Google OAuth request timed out: {e!r}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Google did not respond in time"
+        )
     except Exception as e:
         logger.error(f"Error during Google OAuth: {str(e)}")
         raise HTTPException(
@@ -172,12 +186,13 @@ async def google_callback(
 @router.post("/forgot-password")
 async def forgot_password(
     request: ForgotPasswordRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Forgot password — send email with reset token.
     """
-    user = db.query(User).filter(User.email == request.email).first()
+    result = await db.execute(select(User).where(User.email == request.email))
+    user = result.scalar_one_or_none()
     
     if not user:
         # Don't reveal whether the user exists (security best practice)
@@ -197,18 +212,21 @@ async def forgot_password(
         used=False
     )
     db.add(reset_token)
-    db.commit()
     
     reset_url = f"{settings.FRONTEND_URL}/auth/reset-password?token={token}"
     html_body = get_password_reset_email_html(reset_url)
     text_body = get_password_reset_email_text(reset_url)
     
-    await send_email(
+    # Письмо ставится в outbox в той же транзакции, что и токен; отправляет воркер
+    enqueue_email(
+        db,
         to_email=user.email,
         subject="Password Reset - Fortnite Course",
         html_body=html_body,
         text_body=text_body
     )
+    await db.commit()
+    email_outbox.notify()
     
     return {"message": "If the email exists, a password reset link has been sent."}
 
@@ -216,16 +234,17 @@ async def forgot_password(
 @router.post("/reset-password")
 async def reset_password(
     request: ResetPasswordRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Reset password using token.
     """
     # Find token
-    reset_token = db.query(PasswordResetToken).filter(
+    result = await db.execute(select(PasswordResetToken).where(
         PasswordResetToken.token == request.token,
         PasswordResetToken.used == False
-    ).first()
+    ))
+    reset_token = result.scalar_one_or_none()
     
     if not reset_token:
         raise HTTPException(
@@ -239,18 +258,19 @@ async def reset_password(
             detail="Reset token has expired"
         )
     
-    user = db.query(User).filter(User.id == reset_token.user_id).first()
+    user = await db.get(User, reset_token.user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
     
-    user.hashed_password = get_password_hash(request.new_password)
+    user.hashed_password = await get_password_hash_async(request.new_password)
     user.auth_provider = "email"
     reset_token.used = True
     
-    db.commit()
+    await db.commit()
+    invalidate_principal(user.id)
     
     return {"message": "Password has been reset successfully"}
 
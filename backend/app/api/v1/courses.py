@@ -1,65 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.query_stats import query_budget
 from app.api.dependencies import get_current_user
-from app.models.user import User
-from app.models.course import Course, CourseModule, CourseLesson
+from app.services.principal_cache import Principal
+from app.api.http_cache import conditional_json_response
+from app.models.course import Course
 from app.schemas.course import CourseResponse, CourseListResponse, CourseDetailResponse
+from app.services.courses import load_course_tree
+from app.services.course_cache import cache_get, cache_set
 
 router = APIRouter()
 
 
 @router.get("/", response_model=CourseListResponse)
+@query_budget(2)
 async def get_courses(
+    request: Request,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    courses = db.query(Course).filter(Course.is_active == True).offset(skip).limit(limit).all()
-    total = db.query(Course).filter(Course.is_active == True).count()
+    cached = cache_get("list", skip, limit)
+    if cached is None:
+        result = await db.execute(
+            select(Course).where(Course.is_active == True).offset(skip).limit(limit)
+        )
+        courses = result.scalars().all()
+        total = await db.scalar(
+            select(func.count()).select_from(Course).where(Course.is_active == True)
+        )
+        body = CourseListResponse(courses=courses, total=total).model_dump_json().encode()
+        cached = cache_set(body, "list", skip, limit)
     
-    return CourseListResponse(courses=courses, total=total)
+    return conditional_json_response(request, cached)
 
 
 @router.get("/{course_id}", response_model=CourseDetailResponse)
+@query_budget(4)
 async def get_course(
     course_id: int,
-    db: Session = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user)  # Опционально для неавторизованных
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Optional[Principal] = Depends(get_current_user)  # Опционально для неавторизованных
 ):
-    course = db.query(Course).filter(Course.id == course_id, Course.is_active == True).first()
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    # Загружаем модули и уроки
-    modules = db.query(CourseModule).filter(
-        CourseModule.course_id == course_id
-    ).order_by(CourseModule.order).all()
-    
-    for module in modules:
-        lessons = db.query(CourseLesson).filter(
-            CourseLesson.module_id == module.id
-        ).order_by(CourseLesson.order).all()
-        module.lessons = lessons
+    # При попадании в кеш (и If-None-Match) ORM-дерево вообще не загружается
+    cached = cache_get("detail", course_id)
+    if cached is None:
+        # Курс, модули и уроки — фиксированное число запросов
+        course = await load_course_tree(db, course_id)
+        if not course:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found"
+            )
+        body = CourseDetailResponse.model_validate(course).model_dump_json().encode()
+        cached = cache_set(body, "detail", course_id)
     
-    course_detail = CourseDetailResponse(
-        id=course.id,
-        title=course.title,
-        description=course.description,
-        short_description=course.short_description,
-        price=course.price,
-        currency=course.currency,
-        image_url=course.image_url,
-        is_active=course.is_active,
-        created_at=course.created_at,
-        modules=modules
-    )
-    
-    return course_detail
-
-
-
+    return conditional_json_response(request, cached, private=True)
@@ -1,77 +1,123 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.query_stats import query_budget
 from app.api.dependencies import get_current_user
-from app.models.user import User
+from app.services.principal_cache import Principal
 from app.models.progress import Progress
-from app.models.course import CourseLesson
-from app.schemas.progress import ProgressResponse, ProgressUpdate
+from app.core.config import settings
+from app.schemas.progress import ProgressResponse, ProgressUpdate, ProgressBatchUpdate, ProgressBatchResponse
+from app.services.progress import cap_watched_duration
+from app.services.progress_summary import load_lesson_info, write_progress
+from app.services.progress_buffer import progress_buffer
 
 router = APIRouter()
 
 
 @router.post("/update", response_model=ProgressResponse)
+@query_budget(6)
 async def update_progress(
     progress_data: ProgressUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
+    # All courses are free and accessible - no access check needed
+    
+    if settings.PROGRESS_WRITE_BEHIND:
+        # Later heartbeats for a known lesson only update the buffer
+        entry = progress_buffer.get(current_user.id, progress_data.lesson_id)
+        if entry is not None:
+            entry = progress_buffer.record(
+                entry, progress_data.watched_duration, progress_data.is_completed or False
+            )
+            return entry.as_dict()
+    
     # Check lesson exists
-    lesson = db.query(CourseLesson).filter(CourseLesson.id == progress_data.lesson_id).first()
-    if not lesson:
+    lessons = await load_lesson_info(db, [progress_data.lesson_id])
+    lesson = lessons.get(progress_data.lesson_id)
+    if lesson is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Lesson not found"
         )
     
-    # All courses are free and accessible - no access check needed
+    # INSERT ... ON CONFLICT DO UPDATE keeps the max watched time (don't
+    # decrease on seek) and never un-completes a lesson
+    [progress] = await write_progress(db, [{
+        "user_id": current_user.id,
+        "lesson_id": progress_data.lesson_id,
+        "watched_duration": cap_watched_duration(progress_data.watched_duration, lesson.video_duration),
+        "is_completed": progress_data.is_completed or False,
+    }], lessons)
+    await db.commit()
     
-    # Cap watched time to video duration (never exceed video length)
-    capped_duration = (
-        min(progress_data.watched_duration, lesson.video_duration)
-        if lesson.video_duration
-        else progress_data.watched_duration
-    )
+    if settings.PROGRESS_WRITE_BEHIND:
+        progress_buffer.seed(progress, lesson.video_duration)
     
-    # Find or create progress record
-    progress = db.query(Progress).filter(
-        Progress.user_id == current_user.id,
-        Progress.lesson_id == progress_data.lesson_id
-    ).first()
-    
-    if progress:
-        # Keep max watched (don't decrease on seek), but never exceed video duration
-        new_val = max(progress.watched_duration, capped_duration)
-        if lesson.video_duration and new_val > lesson.video_duration:
-            new_val = lesson.video_duration
-        progress.watched_duration = new_val
-        if progress_data.is_completed:
-            progress.is_completed = True
-    else:
-        progress = Progress(
-            user_id=current_user.id,
-            lesson_id=progress_data.lesson_id,
-            watched_duration=capped_duration,
-            is_completed=progress_data.is_completed or False
+    return progress
+
+
+@router.post("/batch", response_model=ProgressBatchResponse)
+@query_budget(6)
+async def update_progress_batch(
+    batch: ProgressBatchUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Apply many progress updates (e.g. replayed offline events) in one request"""
+    # Merge repeated lessons: max watched time, completed if any event says so
+    merged = {}
+    for item in batch.items:
+        watched, completed = merged.get(item.lesson_id, (0, False))
+        merged[item.lesson_id] = (
+            max(watched, item.watched_duration),
+            completed or bool(item.is_completed),
         )
-        db.add(progress)
     
-    db.commit()
-    db.refresh(progress)
+    # Validate all lessons with one query
+    lessons = await load_lesson_info(db, list(merged))
     
-    return progress
+    rows = [
+        {
+            "user_id": current_user.id,
+            "lesson_id": lesson_id,
+            "watched_duration": cap_watched_duration(watched, lessons[lesson_id].video_duration),
+            "is_completed": completed,
+        }
+        for lesson_id, (watched, completed) in merged.items()
+        if lesson_id in lessons
+    ]
+    progress = await write_progress(db, rows, lessons)
+    await db.commit()
+    
+    if settings.PROGRESS_WRITE_BEHIND:
+        for row in progress:
+            progress_buffer.seed(row, lessons[row["lesson_id"]].video_duration)
+    
+    return ProgressBatchResponse(
+        progress=[ProgressResponse.model_validate(dict(row)) for row in progress],
+        unknown_lesson_ids=sorted(set(merged) - set(lessons)),
+    )
 
 
 @router.get("/lesson/{lesson_id}", response_model=ProgressResponse)
+@query_budget(2)
 async def get_lesson_progress(
     lesson_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
-    progress = db.query(Progress).filter(
+    # Not yet flushed heartbeats are newer than the database row
+    entry = progress_buffer.get_dirty(current_user.id, lesson_id)
+    if entry is not None:
+        return entry.as_dict()
+    
+    result = await db.execute(select(Progress).where(
         Progress.user_id == current_user.id,
         Progress.lesson_id == lesson_id
-    ).first()
+    ))
+    progress = result.scalar_one_or_none()
     
     if not progress:
         from datetime import datetime
@@ -1,40 +1,56 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, status, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.query_stats import query_budget
 from app.api.dependencies import get_current_user
-from app.models.user import User
+from app.services.principal_cache import Principal
+from app.api.http_cache import conditional_json_response
 from app.models.course import Course
 from app.models.resource import CourseResource
 from app.schemas.resource import CourseResourceResponse
+from app.services.course_cache import cache_get, cache_set
 
 router = APIRouter()
 
+_resource_list = TypeAdapter(list[CourseResourceResponse])
+
 
 @router.get("/course/{course_id}", response_model=list[CourseResourceResponse])
+@query_budget(3)
 async def get_course_resources(
     course_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Получение ресурсов курса (только для пользователей с доступом)"""
-    # Проверка существования курса
-    course = db.query(Course).filter(
-        Course.id == course_id,
-        Course.is_active == True
-    ).first()
-    
-    if not course:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Course not found"
-        )
-    
-    # All courses are free and accessible - no access check needed
-    
-    # Получаем ресурсы курса
-    resources = db.query(CourseResource).filter(
-        CourseResource.course_id == course_id
-    ).order_by(CourseResource.order).all()
+    cached = cache_get("resources", course_id)
+    if cached is None:
+        # Проверка существования курса
+        result = await db.execute(select(Course).where(
+            Course.id == course_id,
+            Course.is_active == True
+        ))
+        course = result.scalar_one_or_none()
+        
+        if not course:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Course not found"
+            )
+        
+        # All courses are free and accessible - no access check needed
+        
+        # Получаем ресурсы курса
+        result = await db.execute(select(CourseResource).where(
+            CourseResource.course_id == course_id
+        ).order_by(CourseResource.order))
+        resources = result.scalars().all()
+        
+        body = _resource_list.dump_json(_resource_list.validate_python(resources, from_attributes=True))
+        cached = cache_set(body, "resources", course_id)
     
-    return resources
+    return conditional_json_response(request, cached, private=True)
 
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
-from app.core.database import get_db
-from app.core.security import verify_password, get_password_hash, create_access_token
+from app.core.database import get_async_db
+from app.core.security import verify_password_async, get_password_hash_async, create_user_access_token
 from app.core.config import settings
-from app.api.dependencies import get_current_user
+from app.api.dependencies import get_current_profile
 from app.models.user import User
 from app.schemas.user import UserCreate, UserLogin, UserResponse, Token
 
@@ -12,11 +13,12 @@ router = APIRouter()
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     # Проверка существования пользователя
-    db_user = db.query(User).filter(
+    result = await db.execute(select(User).where(
         (User.email == user_data.email) | (User.username == user_data.username)
-    ).first()
+    ))
+    db_user = result.scalars().first()
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -24,7 +26,7 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Создание нового пользователя
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
@@ -33,15 +35,16 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
         auth_provider="email"  # Явно указываем, что это email регистрация
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == user_data.email).first()
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    result = await db.execute(select(User).where(User.email == user_data.email))
+    user = result.scalar_one_or_none()
     
     # Проверка существования пользователя
     if not user:
@@ -59,7 +62,7 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
         )
     
     # Проверка пароля
-    if not user.hashed_password or not verify_password(user_data.password, user.hashed_password):
+    if not user.hashed_password or not await verify_password_async(user_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -73,8 +76,8 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
         )
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": str(user.id)}, expires_delta=access_token_expires
+    access_token = create_user_access_token(
+        user, expires_delta=access_token_expires
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
@@ -82,7 +85,7 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user)
+    current_user: UserResponse = Depends(get_current_profile)
 ):
     return current_user
 
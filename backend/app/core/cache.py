@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+from app.core.metrics import REGISTRY
+
+
+class TTLCache:
+    """
+    Small in-process LRU cache whose entries also expire after `ttl` seconds.
+
+    Keeps hit/miss/eviction counters so callers can expose them as metrics.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._next_purge = 0.0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                self.evictions += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize and now >= self._next_purge:
+                # Full: drop expired entries first (at most once a second),
+                # so they don't push out live ones
+                self._purge_expired(now)
+                self._next_purge = now + 1.0
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def _purge_expired(self, now: float) -> None:
+        expired = [key for key, (expires_at, _) in self._data.items() if expires_at <= now]
+        for key in expired:
+            del self._data[key]
+        self.evictions += len(expired)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_named_caches: Dict[str, TTLCache] = {}
+
+
+def register_cache(name: str, cache: TTLCache) -> TTLCache:
+    """Report the cache's counters on /metrics under cache="<name>"."""
+    _named_caches[name] = cache
+    return cache
+
+
+@REGISTRY.register_collector
+def _cache_metrics():
+    stats = {name: cache.stats() for name, cache in _named_caches.items()}
+    for key, kind, help in (
+        ("hits", "counter", "Cache hits"),
+        ("misses", "counter", "Cache misses"),
+        ("evictions", "counter", "Entries evicted (expired or LRU)"),
+        ("size", "gauge", "Entries currently cached"),
+    ):
+        suffix = "_total" if kind == "counter" else ""
+        yield f"cache_{key}{suffix}", kind, help, [({"cache": name}, s[key]) for name, s in stats.items()]
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
-from typing import List, Union
+from typing import List, Optional, Union
 
 
 def _normalize_cors_origins(v: Union[str, List[str]]) -> List[str]:
@@ -13,11 +13,35 @@ def _normalize_cors_origins(v: Union[str, List[str]]) -> List[str]:
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
+    # Connection pool (per engine, per worker process). Render Postgres drops
+    # idle connections, so connections are pinged on checkout and recycled
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30  # seconds to wait for a free connection
+    DB_POOL_RECYCLE: int = 300  # seconds; keep below the server's idle timeout
+    DB_POOL_PRE_PING: bool = True
+    # Behind PgBouncer (transaction pooling): no app-side pool, no prepared statement cache
+    DB_PGBOUNCER_MODE: bool = False
     
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Embed profile claims (email, username, ...) in access tokens so
+    # get_current_user and /me don't need the database
+    ACCESS_TOKEN_EMBED_PROFILE: bool = True
+    # Cache of verified token payloads (skips HMAC + claims parsing per request)
+    ACCESS_TOKEN_CACHE_ENABLED: bool = True
+    ACCESS_TOKEN_CACHE_MAX_ENTRIES: int = 4096
+    # Cache of authenticated users for get_current_user (in-process)
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Password hashing (bcrypt runs in a bounded pool, off the event loop)
+    PASSWORD_HASH_EXECUTOR: str = "process"  # "process" or "thread"
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_QUEUE_LIMIT: int = 32
     
     # Stripe (опционально для тестирования)
     STRIPE_SECRET_KEY: str = "sk_test_dummy"
@@ -28,12 +52,39 @@ class Settings(BaseSettings):
     YOOKASSA_SHOP_ID: str = "123456"
     YOOKASSA_SECRET_KEY: str = "test_dummy_key"
     
+    # Course catalog / detail response cache (in-process)
+    COURSE_CACHE_ENABLED: bool = True
+    COURSE_CACHE_TTL_SECONDS: int = 300
+    COURSE_CACHE_MAX_ENTRIES: int = 256
+    # Cache-Control for course/resource responses (seconds)
+    COURSE_HTTP_MAX_AGE: int = 60
+    COURSE_HTTP_STALE_WHILE_REVALIDATE: int = 300
+    
+    # Video progress write-behind buffer (coalesces player heartbeats)
+    PROGRESS_WRITE_BEHIND: bool = True
+    PROGRESS_FLUSH_INTERVAL_SECONDS: float = 5.0
+    PROGRESS_FLUSH_MAX_DIRTY: int = 500
+    PROGRESS_BUFFER_MAX_ENTRIES: int = 10000
+    # Read course progress from user_course_progress (run
+    # scripts/rebuild_progress_summary.py after re-enabling)
+    PROGRESS_SUMMARY_ENABLED: bool = True
+    
     # Frontend
     FRONTEND_URL: str = "http://localhost:3000"
     
     # Google OAuth (опционально)
     GOOGLE_CLIENT_ID: str = ""
     GOOGLE_CLIENT_SECRET: str = ""
+    GOOGLE_TOKEN_URL: str = "https://oauth2.googleapis.com/token"
+    GOOGLE_USERINFO_URL: str = "https://www.googleapis.com/oauth2/v2/userinfo"
+
+    # Shared outbound HTTP client (app/core/http_client.py)
+    HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_CLIENT_TIMEOUT_SECONDS: float = 10.0  # read, write and waiting for a pooled connection
+    HTTP_CLIENT_MAX_CONNECTIONS: int = 20
+    HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    HTTP_CLIENT_KEEPALIVE_SECONDS: float = 60.0
+    HTTP_CLIENT_HTTP2: bool = True  # when the h2 package is installed
     
     # Email SMTP (для сброса пароля)
     SMTP_HOST: str = "smtp.gmail.com"
@@ -42,6 +93,39 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: str = ""
     SMTP_FROM_EMAIL: str = ""
     SMTP_FROM_NAME: str = "Fortnite Course"
+    # Pool of authenticated SMTP connections (app/core/smtp_pool.py)
+    SMTP_POOL_SIZE: int = 3
+    SMTP_POOL_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_POOL_KEEPALIVE_SECONDS: float = 30.0  # NOOP idle connections this often
+    SMTP_POOL_MAX_IDLE_SECONDS: float = 120.0
+    # Email outbox: requests only queue emails, a worker delivers them.
+    # Disable the in-app worker when scripts/email_worker.py runs separately
+    EMAIL_OUTBOX_WORKER_ENABLED: bool = True
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5.0
+    EMAIL_OUTBOX_BATCH_SIZE: int = 20
+    EMAIL_OUTBOX_CONCURRENCY: int = 4
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_RETRY_BASE_SECONDS: int = 30  # doubles per attempt
+    EMAIL_OUTBOX_RETRY_MAX_SECONDS: int = 3600
+    # How long a claimed email stays invisible to other workers, renewed right
+    # before its send; must exceed the slowest send (two ports x 20 s timeouts)
+    EMAIL_OUTBOX_LEASE_SECONDS: int = 120
+    # Bulk announcements (scripts/send_announcement.py); keep under the SMTP provider's limit
+    ANNOUNCEMENT_RATE_PER_MINUTE: int = 300
+    
+    # Prometheus metrics at GET /metrics; METRICS_TOKEN requires
+    # "Authorization: Bearer <token>" from the scraper. Without a token the
+    # endpoint answers 404 outside development/test. The same token unlocks
+    # the pool details on GET /health/db (otherwise it only reports up/down)
+    METRICS_ENABLED: bool = True
+    METRICS_TOKEN: Optional[str] = None
+    
+    # SQL inspection: X-DB-* response headers in development; in test mode
+    # (ENVIRONMENT=test) requests fail on @query_budget overruns and on a
+    # statement repeated more than SQL_REPEATED_STATEMENT_LIMIT times (N+1)
+    SQL_REPEATED_STATEMENT_LIMIT: int = 5
+    # Raise instead of lazy loading Course.modules, CourseModule.lessons, CourseLesson.progress
+    SQL_RAISE_ON_LAZY_LOAD: bool = False
     
     # Environment
     ENVIRONMENT: str = "development"
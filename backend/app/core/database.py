@@ -1,13 +1,47 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.db_pool import engine_options, instrument_pool, register_pool_metrics
+from app.core.query_stats import instrument_queries
 
-engine = create_engine(settings.DATABASE_URL)
+
+def _to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL (e.g. from Render) to its async driver variant."""
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    if url.startswith("postgresql://") or url.startswith("postgresql+psycopg2://"):
+        return "postgresql+asyncpg://" + url.split("://", 1)[1]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+
+# Sync engine — used by alembic and scripts/
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, is_async=False))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine — used by the API so queries don't block the event loop
+async_engine = create_async_engine(
+    _to_async_url(settings.DATABASE_URL), **engine_options(settings.DATABASE_URL, is_async=True)
+)
+instrument_pool(async_engine.sync_engine)
+register_pool_metrics(async_engine.sync_engine)
+instrument_queries(async_engine.sync_engine)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
+# lazy= for relationships that must be eager-loaded explicitly (selectinload);
+# "raise_on_sql" turns an accidental N+1 into an error under tests
+LAZY_LOAD = "raise_on_sql" if settings.SQL_RAISE_ON_LAZY_LOAD else "select"
+
 
 def get_db():
     db = SessionLocal()
@@ -16,3 +50,7 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,108 @@
+"""
+Connection pool configuration and metrics for the sync and async engines.
+
+Pool size, overflow, timeout, recycle and pre-ping come from Settings. With
+DB_PGBOUNCER_MODE the app keeps no pool of its own (NullPool) and asyncpg
+doesn't cache prepared statements, which PgBouncer in transaction mode can't
+route. Checkout wait times, opened and invalidated connections are recorded
+for the API engine and served on /health/db and /metrics.
+"""
+import time
+from typing import Any, Dict
+from uuid import uuid4
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from app.core.config import settings
+from app.core.metrics import REGISTRY, Counter, Histogram
+
+pool_wait_seconds = Histogram("db_pool_checkout_wait_seconds", "Time waiting for a pooled connection")
+connections_opened = Counter("db_pool_connections_opened_total", "New database connections")
+connections_invalidated = Counter(
+    "db_pool_connections_invalidated_total", "Connections discarded as broken (incl. failed pre-ping)"
+)
+
+
+class _TimedCheckoutMixin:
+    def _do_get(self):
+        # Time spent waiting for a free connection (or opening an overflow one)
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_seconds.observe(time.perf_counter() - start)
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool) -> Dict[str, Any]:
+    """Keyword arguments for create_engine / create_async_engine."""
+    if url.startswith("sqlite"):
+        # File/in-memory SQLite (local dev, benchmarks): driver defaults
+        return {}
+    if settings.DB_PGBOUNCER_MODE:
+        options: Dict[str, Any] = {"poolclass": NullPool}
+        if is_async:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                # Unique names so statements from different server sessions don't clash
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return options
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if is_async:
+        # Only the API engine's checkout waits are recorded
+        options["poolclass"] = TimedAsyncAdaptedQueuePool
+    return options
+
+
+def instrument_pool(engine: Engine) -> None:
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        connections_opened.inc()
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        # Includes connections found dead by pre-ping
+        connections_invalidated.inc()
+
+
+def pool_stats(engine: Engine) -> Dict[str, Any]:
+    """Live state of the engine's pool plus process-wide counters."""
+    pool = engine.pool
+    stats: Dict[str, Any] = {
+        "pool": type(pool).__name__,
+        "connections_opened": int(connections_opened.value()),
+        "connections_invalidated": int(connections_invalidated.value()),
+    }
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    stats["wait_seconds"] = pool_wait_seconds.snapshot()
+    return stats
+
+
+def register_pool_metrics(engine: Engine) -> None:
+    """Report the engine's live pool state on /metrics."""
+
+    def collect():
+        stats = pool_stats(engine)
+        for key in ("size", "checked_out", "overflow"):
+            if key in stats:
+                yield f"db_pool_{key}", "gauge", f"Connection pool {key.replace('_', ' ')}", [({}, stats[key])]
+
+    REGISTRY.register_collector(collect)
@@ -0,0 +1,130 @@
+"""
+Email templates (app/templates/email), compiled once.
+
+An email is <name>.html plus an optional <name>.txt; both may extend
+base.html / base.txt. The rules of email.css are inlined into style=""
+attributes when an HTML template is loaded (many mail clients drop <style>
+blocks), so a compiled template already produces the final markup and a
+render is only Jinja2 output. load() compiles everything at startup, which
+also makes a broken template fail the deploy instead of a password reset.
+
+The inliner understands the selectors email.css uses: tag, .class,
+tag.class and comma-separated lists of those. It rewrites start tags with a
+regex, so Jinja2 tags must not contain "<" or ">" inside HTML tags.
+"""
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template, select_autoescape
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates" / "email"
+STYLESHEET = "email.css"
+
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+_CSS_RULE = re.compile(r"([^{}]+)\{([^{}]*)\}")
+_SELECTOR = re.compile(r"^([a-zA-Z][a-zA-Z0-9]*)?(?:\.([\w-]+))?$")
+_START_TAG = re.compile(r"<([a-zA-Z][a-zA-Z0-9]*)((?:\s[^<>]*?)?)(/?)>")
+_CLASS_ATTR = re.compile(r'\sclass="([^"]*)"')
+_STYLE_ATTR = re.compile(r'\sstyle="([^"]*)"')
+
+CssRule = Tuple[Optional[str], Optional[str], str]  # (tag, class, declarations)
+
+
+def _declarations(block: str) -> str:
+    return "; ".join(part.strip() for part in block.split(";") if part.strip())
+
+
+def parse_css(css: str) -> List[CssRule]:
+    """Rules in the order they apply: by specificity (tag < class < tag.class), then source order."""
+    rules = []
+    for selectors, block in _CSS_RULE.findall(_CSS_COMMENT.sub("", css)):
+        declarations = _declarations(block)
+        for selector in selectors.split(","):
+            match = _SELECTOR.match(selector.strip())
+            if match is None or not any(match.groups()):
+                raise ValueError(f"Unsupported selector for inlining: {selector.strip()!r}")
+            tag, cls = match.groups()
+            rules.append((tag.lower() if tag else None, cls, declarations))
+    return sorted(rules, key=lambda rule: (rule[1] is not None) + 2 * (rule[0] is not None and rule[1] is not None))
+
+
+def inline_css(html: str, rules: List[CssRule]) -> str:
+    """Add matching rules to each start tag's style attribute; an existing style wins."""
+    def apply(match):
+        tag, attrs, close = match.groups()
+        class_match = _CLASS_ATTR.search(attrs)
+        classes = set(class_match.group(1).split()) if class_match else set()
+        styles = [
+            declarations for rule_tag, rule_class, declarations in rules
+            if (rule_tag is None or rule_tag == tag.lower()) and (rule_class is None or rule_class in classes)
+        ]
+        if not styles:
+            return match.group(0)
+        style_match = _STYLE_ATTR.search(attrs)
+        if style_match:
+            styles.append(_declarations(style_match.group(1)))
+            attrs = attrs[:style_match.start()] + attrs[style_match.end():]
+        return f'<{tag}{attrs} style="{"; ".join(styles)}"{close}>'
+    return _START_TAG.sub(apply, html)
+
+
+class _InliningLoader(FileSystemLoader):
+    def __init__(self, directory: Path, rules: List[CssRule]):
+        super().__init__(str(directory))
+        self.rules = rules
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        if template.endswith(".html"):
+            source = inline_css(source, self.rules)
+        return source, filename, uptodate
+
+
+class EmailTemplates:
+    def __init__(self, directory: Path = TEMPLATE_DIR):
+        self.directory = directory
+        stylesheet = directory / STYLESHEET
+        self.rules = parse_css(stylesheet.read_text(encoding="utf-8")) if stylesheet.exists() else []
+        self.env = Environment(
+            loader=_InliningLoader(directory, self.rules),
+            autoescape=select_autoescape(["html"]),
+            undefined=StrictUndefined,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            keep_trailing_newline=True,
+            auto_reload=False,
+        )
+        # Same loader and settings, always autoescaping (for sources without a .html name)
+        self._html_env = self.env.overlay(autoescape=True)
+        # Template file name -> compiled template, None when the file doesn't exist
+        self._templates: Dict[str, Optional[Template]] = {}
+
+    def load(self) -> None:
+        """Compile every template up front (app startup)."""
+        for path in sorted(self.directory.iterdir()):
+            if path.suffix in (".html", ".txt"):
+                self._templates[path.name] = self.env.get_template(path.name)
+
+    def get(self, filename: str) -> Optional[Template]:
+        if filename not in self._templates:
+            path = self.directory / filename
+            self._templates[filename] = self.env.get_template(filename) if path.exists() else None
+        return self._templates[filename]
+
+    def render(self, name: str, **context) -> Tuple[str, Optional[str]]:
+        """HTML and text (None without a .txt variant) of email `name`."""
+        html_template = self.get(f"{name}.html")
+        if html_template is None:
+            raise LookupError(f"No email template {name}.html in {self.directory}")
+        text_template = self.get(f"{name}.txt")
+        return html_template.render(context), text_template.render(context) if text_template else None
+
+    def compile_html(self, source: str) -> Template:
+        """Compile HTML from elsewhere (announcements) like the files: CSS inlined, autoescaped."""
+        return self._html_env.from_string(inline_css(source, self.rules))
+
+    def compile_text(self, source: str) -> Template:
+        return self.env.from_string(source)
+
+
+email_templates = EmailTemplates()
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutorBusyError(Exception):
+    """Raised when a BoundedExecutor already has max_queue jobs waiting."""
+
+
+class BoundedExecutor:
+    """
+    Runs blocking CPU-bound callables off the event loop.
+
+    At most max_workers jobs run at once; up to max_queue more may wait.
+    Anything beyond that is rejected with ExecutorBusyError instead of piling
+    up behind a login burst.
+
+    Process workers are started by a forkserver: the pool is created on first
+    use inside a server that already runs threads, and forking a threaded
+    process can leave a child stuck on a lock copied mid-acquire. A pool whose
+    worker died (e.g. OOM-killed) is replaced instead of failing every later
+    call.
+    """
+
+    def __init__(self, kind: str = "process", max_workers: int = 2, max_queue: int = 32):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown executor kind: {kind}")
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self._executor: Optional[Executor] = None
+        self._pending = 0
+        self.rejected = 0
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so importing the module never forks/spawns workers
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("forkserver")
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="bounded-executor"
+                )
+            logger.info(f"Started {self.kind} executor with {self.max_workers} worker(s)")
+        return self._executor
+
+    @property
+    def in_flight(self) -> int:
+        return self._pending
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self.max_workers)
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorBusyError(f"{self.kind} executor queue is full ({self.max_queue})")
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        try:
+            return await self._submit(loop, executor, fn, args)
+        except BrokenProcessPool:
+            # Jobs here are pure functions, so one retry on a fresh pool is safe
+            self._discard_broken(executor)
+            return await self._submit(loop, self._get_executor(), fn, args)
+
+    def _submit(self, loop: asyncio.AbstractEventLoop, executor: Executor, fn: Callable[..., Any], args) -> asyncio.Future:
+        self._pending += 1
+        try:
+            future = executor.submit(fn, *args)
+        except BaseException:
+            self._pending -= 1
+            raise
+        # The slot is freed when the job ends, not when the caller stops
+        # waiting: a cancelled await (client gone) leaves a started job running
+        future.add_done_callback(partial(self._job_done, loop))
+        return asyncio.wrap_future(future, loop=loop)
+
+    def _job_done(self, loop: asyncio.AbstractEventLoop, _future) -> None:
+        # Runs on an executor thread; _pending belongs to the event loop
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:  # loop already closed
+            self._release()
+
+    def _release(self) -> None:
+        self._pending -= 1
+
+    def _discard_broken(self, executor: Executor) -> None:
+        # Concurrent callers see the same broken pool; only the first replaces it
+        if self._executor is executor:
+            logger.error(f"{self.kind} executor broke (a worker died); starting a new one")
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,59 @@
+"""
+Shared outbound HTTP client (Google OAuth, YouTube Data API).
+
+One httpx.AsyncClient per process keeps connections to Google alive between
+logins instead of paying a TCP + TLS handshake for every request, and sets
+explicit timeouts (httpx's default is 5 s for everything; a hung Google
+endpoint should fail the login fast, not hold a worker) and pool limits.
+HTTP/2 is negotiated when the h2 package is installed (httpx[http2]).
+
+The app lifespan closes the client; scripts call close_http_client()
+themselves. Connections belong to the event loop that opened them, so a new
+client is created when used from another loop.
+"""
+import asyncio
+import importlib.util
+from typing import Optional
+import httpx
+from app.core.config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def create_http_client(**kwargs) -> httpx.AsyncClient:
+    """A client with the app's timeouts and limits; keyword arguments override them."""
+    options = {
+        "http2": settings.HTTP_CLIENT_HTTP2 and http2_available(),
+        "timeout": httpx.Timeout(
+            settings.HTTP_CLIENT_TIMEOUT_SECONDS, connect=settings.HTTP_CLIENT_CONNECT_TIMEOUT_SECONDS
+        ),
+        "limits": httpx.Limits(
+            max_connections=settings.HTTP_CLIENT_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_CLIENT_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_CLIENT_KEEPALIVE_SECONDS,
+        ),
+    }
+    options.update(kwargs)
+    return httpx.AsyncClient(**options)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client.is_closed or _client_loop is not loop:
+        _client = create_http_client()
+        _client_loop = loop
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client, _client_loop
+    if _client is not None and _client_loop is asyncio.get_running_loop():
+        await _client.aclose()
+    _client = None
+    _client_loop = None
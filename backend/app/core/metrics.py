@@ -0,0 +1,166 @@
+"""
+Minimal in-process metrics (counters, gauges, histograms) rendered in the
+Prometheus text exposition format by GET /metrics.
+
+Values are per worker process; scrape every worker or aggregate upstream.
+"""
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; suits request latency, DB waits and SMTP sends alike
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10_000, 100_000, 1_000_000, 10_000_000)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+# A collector returns (name, type, help, [(labels, value), ...]) for values read on scrape
+Sample = Tuple[Dict[str, str], float]
+CollectorResult = Iterable[Tuple[str, str, str, List[Sample]]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), registry: Optional["Registry"] = None):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _labels(self, key: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}", *self._samples()]
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self._labels(key))} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    """
+    Cumulative-bucket histogram: observe() values, snapshot() returns counts
+    per upper bound ("le") plus sum and count.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: Optional["Registry"] = None):
+        super().__init__(name, help, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket..., +Inf count], sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def snapshot(self, **labels: str) -> Dict[str, object]:
+        with self._lock:
+            counts, total = self._series.get(self._key(labels), ([0] * (len(self.buckets) + 1), [0.0]))
+            counts, total = list(counts), total[0]
+        cumulative, buckets = 0, {}
+        for bound, count in zip((*self.buckets, float("inf")), counts):
+            cumulative += count
+            buckets[_format_value(bound)] = cumulative
+        return {"buckets": buckets, "sum": total, "count": cumulative}
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            keys = list(self._series)
+        lines = []
+        for key in keys:
+            labels = self._labels(key)
+            snapshot = self.snapshot(**labels)
+            for bound, count in snapshot["buckets"].items():
+                lines.append(f"{self.name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {_format_value(snapshot['sum'])}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {snapshot['count']}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], CollectorResult]] = []
+
+    def register(self, metric: _Metric) -> None:
+        self._metrics.append(metric)
+
+    def register_collector(self, collector: Callable[[], CollectorResult]) -> Callable[[], CollectorResult]:
+        """Register a function producing values at scrape time (pool state, cache stats, ...)."""
+        self._collectors.append(collector)
+        return collector
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
@@ -0,0 +1,167 @@
+"""
+Per-request SQL statistics and an N+1 detector.
+
+instrument_queries() hooks the engine's cursor events and adds every
+statement to the QueryStats of the request being served (a ContextVar, so it
+follows the request into SQLAlchemy's greenlet). QueryInspectorMiddleware
+reads those stats when the response starts:
+
+- with headers enabled (development) it adds X-DB-Queries, X-DB-Time-Ms and,
+  when a statement shape repeats, X-DB-Repeated-Statements;
+- with enforcement enabled (ENVIRONMENT=test) it raises QueryBudgetExceeded
+  when a route runs more statements than its @query_budget, or the same
+  statement shape more than SQL_REPEATED_STATEMENT_LIMIT times — the
+  signature of a lazy load inside a loop.
+
+Statements issued after the response has started (background tasks) are not
+checked.
+"""
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryBudgetExceeded(Exception):
+    """Raised in test mode when a request exceeds its SQL budget."""
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    # Raw statement text -> executions; shapes are derived only when checked
+    statements: Dict[str, int] = field(default_factory=dict)
+
+    def repeated(self, limit: int) -> List[Tuple[str, int]]:
+        """Statement shapes executed more than `limit` times, most frequent first."""
+        shapes: Dict[str, int] = {}
+        for statement, count in self.statements.items():
+            shape = statement_shape(statement)
+            shapes[shape] = shapes.get(shape, 0) + count
+        return sorted(
+            ((shape, count) for shape, count in shapes.items() if count > limit),
+            key=lambda item: -item[1],
+        )
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("request_query_stats", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+# asyncpg numbered params ($1, $2::INTEGER) and expanded IN lists (?, ?, ?)
+_NUMBERED_PARAM = re.compile(r"\$\d+(::[\w ]+?(?=[,)\s]|$))?")
+_PARAM_LIST = re.compile(r"\?(\s*,\s*\?)+")
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so the same query with other parameters compares equal."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _NUMBERED_PARAM.sub("?", shape)
+    return _PARAM_LIST.sub("?", shape)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Statistics of the request being served, None outside of a request."""
+    return _query_stats.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Collect statistics for the enclosed block (scripts, benchmarks)."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def instrument_queries(engine: Engine) -> None:
+    """Count statements and their time into the current request's QueryStats."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_started_at = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats = _query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += time.perf_counter() - context._query_started_at
+            stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+
+def query_budget(max_queries: int) -> Callable:
+    """
+    Declare how many SQL statements a route may run, authentication included.
+    Checked by QueryInspectorMiddleware in test mode.
+    """
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.query_budget = max_queries
+        return endpoint
+    return decorator
+
+
+def _route_budget(scope) -> Optional[int]:
+    route = scope.get("route")
+    return getattr(getattr(route, "endpoint", None), "query_budget", None)
+
+
+class QueryInspectorMiddleware:
+    def __init__(self, app, headers: bool = False, enforce: bool = False, repeated_limit: int = 5):
+        self.app = app
+        self.headers = headers
+        self.enforce = enforce
+        self.repeated_limit = repeated_limit
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (self.headers or self.enforce):
+            await self.app(scope, receive, send)
+            return
+
+        # RequestMetricsMiddleware (outermost) may already collect for this request
+        stats = _query_stats.get()
+        token = None
+        if stats is None:
+            stats = QueryStats()
+            token = _query_stats.set(stats)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                repeated = stats.repeated(self.repeated_limit)
+                if self.enforce:
+                    self._check(scope, stats, repeated)
+                if self.headers:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-db-queries", str(stats.count).encode()))
+                    headers.append((b"x-db-time-ms", f"{stats.seconds * 1000:.1f}".encode()))
+                    if repeated:
+                        headers.append((b"x-db-repeated-statements", str(len(repeated)).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if token is not None:
+                _query_stats.reset(token)
+
+    def _check(self, scope, stats: QueryStats, repeated: List[Tuple[str, int]]) -> None:
+        where = f"{scope['method']} {scope['path']}"
+        budget = _route_budget(scope)
+        if budget is not None and stats.count > budget:
+            raise QueryBudgetExceeded(
+                f"{where} ran {stats.count} SQL statements, budget is {budget}:\n"
+                + "\n".join(f"  {count}x {statement_shape(statement)}" for statement, count in stats.statements.items())
+            )
+        if repeated:
+            shape, count = repeated[0]
+            raise QueryBudgetExceeded(
+                f"{where} repeated a statement {count} times "
+                f"(limit {self.repeated_limit}), likely N+1:\n  {shape}"
+            )
@@ -0,0 +1,87 @@
+"""
+Per-route HTTP metrics and per-request database statistics.
+
+RequestMetricsMiddleware records request counts, latency, in-flight requests
+and response sizes labelled by the route template (e.g.
+/api/v1/courses/{course_id}, never the raw URL), plus how many SQL statements
+each request ran and how long they took. Requests that match no route are
+labelled "unmatched" to keep label cardinality bounded.
+"""
+import time
+from starlette.routing import Match
+from app.core.metrics import COUNT_BUCKETS, SIZE_BUCKETS, Counter, Gauge, Histogram
+from app.core.query_stats import track_queries
+
+http_requests_total = Counter(
+    "http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+http_request_duration_seconds = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+http_requests_in_flight = Gauge(
+    "http_requests_in_flight", "HTTP requests being served", ("method", "route")
+)
+http_response_size_bytes = Histogram(
+    "http_response_size_bytes", "HTTP response body size", ("method", "route"), buckets=SIZE_BUCKETS
+)
+db_queries_per_request = Histogram(
+    "db_queries_per_request", "SQL statements executed per request", ("route",), buckets=COUNT_BUCKETS
+)
+db_time_per_request_seconds = Histogram(
+    "db_time_per_request_seconds", "Time spent in SQL statements per request", ("route",)
+)
+
+
+def route_template(scope) -> str:
+    """
+    Template of the route the router will dispatch scope to. Resolved before
+    the request runs (the in-flight gauge needs it up front) the way the
+    router does: the first full match, else the first path-only match (405).
+    """
+    router = getattr(scope.get("app"), "router", None)
+    partial = None
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", None) or "unmatched"
+        if match == Match.PARTIAL and partial is None:
+            partial = route
+    return getattr(partial, "path", None) or "unmatched"
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        body_size = 0
+
+        async def send_wrapper(message):
+            nonlocal status_code, body_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+            await send(message)
+
+        route = route_template(scope)
+        http_requests_in_flight.inc(method=method, route=route)
+        started_at = time.perf_counter()
+        try:
+            with track_queries() as stats:
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started_at
+            http_requests_in_flight.dec(method=method, route=route)
+            http_requests_total.inc(method=method, route=route, status=str(status_code))
+            http_request_duration_seconds.observe(elapsed, method=method, route=route)
+            http_response_size_bytes.observe(body_size, method=method, route=route)
+            db_queries_per_request.observe(stats.count, route=route)
+            db_time_per_request_seconds.observe(stats.seconds, route=route)
@@ -1,8 +1,33 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
+from app.core.cache import TTLCache, register_cache
 from app.core.config import settings
+from app.core.executor import BoundedExecutor
+from app.core.metrics import REGISTRY
+
+# Пул для bcrypt, чтобы хеширование не блокировало event loop
+password_hasher = BoundedExecutor(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_QUEUE_LIMIT,
+)
+
+
+@REGISTRY.register_collector
+def _password_hasher_metrics():
+    yield "password_hash_in_flight", "gauge", "bcrypt jobs running or queued", [({}, password_hasher.in_flight)]
+    yield "password_hash_queue_depth", "gauge", "bcrypt jobs waiting for a worker", [({}, password_hasher.queue_depth)]
+    yield "password_hash_rejected_total", "counter", "bcrypt jobs rejected with 503", [({}, password_hasher.rejected)]
+
+# Проверенные payload токенов по sha256(token); запись живёт до exp токена
+decoded_tokens = register_cache("access_tokens", TTLCache(
+    maxsize=settings.ACCESS_TOKEN_CACHE_MAX_ENTRIES,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+))
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -29,6 +54,16 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password в пуле password_hasher"""
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash в пуле password_hasher"""
+    return await password_hasher.run(get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -40,14 +75,50 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+def create_user_access_token(user, expires_delta: Optional[timedelta] = None) -> str:
+    """
+    Access token for a User: "sub" and "ver" (token_version), plus the
+    profile claims when ACCESS_TOKEN_EMBED_PROFILE is on.
+    """
+    data = {"sub": str(user.id), "ver": user.token_version or 0}
+    if settings.ACCESS_TOKEN_EMBED_PROFILE:
+        data.update({
+            "email": user.email,
+            "username": user.username,
+            "name": user.full_name,
+            "active": bool(user.is_active),
+            "su": bool(user.is_superuser),
+            "created": user.created_at.isoformat() if user.created_at else None,
+        })
+    return create_access_token(data, expires_delta)
+
+
+def has_profile_claims(payload: dict) -> bool:
+    """Token was issued by create_user_access_token with profile claims"""
+    return all(payload.get(claim) is not None for claim in ("email", "username", "active", "created"))
+
+
 def decode_access_token(token: str) -> Optional[dict]:
     import logging
     logger = logging.getLogger(__name__)
     
+    # Один и тот же bearer-токен приходит на каждый запрос: проверенный
+    # payload кэшируется до его exp
+    key = hashlib.sha256(token.encode("utf-8")).digest() if settings.ACCESS_TOKEN_CACHE_ENABLED else None
+    if key is not None:
+        cached = decoded_tokens.get(key)
+        if cached is not None:
+            return dict(cached)
+    
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         logger.debug(f"Token decoded successfully for user ID: {payload.get('sub')}")
-        return payload
+        if key is not None:
+            exp = payload.get("exp")
+            ttl = exp - time.time() if isinstance(exp, (int, float)) else decoded_tokens.ttl
+            if ttl > 0:
+                decoded_tokens.set(key, payload, ttl=ttl)
+        return dict(payload)
     except JWTError as e:
         logger.warning(f"JWT decode error: {str(e)}")
         return None
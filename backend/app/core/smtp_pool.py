@@ -0,0 +1,218 @@
+"""
+Pool of authenticated SMTP connections.
+
+Opening a connection costs a TCP + TLS handshake and AUTH, and the provider
+fallback (port 465, then 587 with STARTTLS) used to be probed again for
+every email. SMTPPool instead:
+
+- remembers the transport (port, TLS mode) that last connected and tries it
+  first, falling back to the others only when it fails;
+- keeps up to SMTP_POOL_SIZE connections and sends many messages over each
+  (at most SMTP_POOL_MAX_MESSAGES_PER_CONNECTION, providers cap this);
+- keeps idle connections warm with NOOP every SMTP_POOL_KEEPALIVE_SECONDS
+  and closes them after SMTP_POOL_MAX_IDLE_SECONDS without use;
+- retries a message once on a fresh connection when a reused one turns out
+  to have been dropped by the server.
+
+Connections belong to the event loop that opened them; the pool starts over
+when used from another loop (scripts, benchmarks).
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from email.message import Message
+from typing import List, Optional, Tuple
+import aiosmtplib
+from app.core.config import settings
+from app.core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+Transport = Tuple[int, bool]  # (port, use_tls)
+
+# Errors meaning the server closed a pooled connection while it sat idle
+_STALE_CONNECTION_ERRORS = (aiosmtplib.SMTPServerDisconnected, ConnectionError, asyncio.IncompleteReadError)
+
+
+class EmailDeliveryError(Exception):
+    """Raised by deliver_email when every SMTP attempt failed or SMTP is not configured."""
+
+
+@dataclass
+class _Connection:
+    smtp: aiosmtplib.SMTP
+    transport: Transport
+    sent: int = 0
+    last_used: float = field(default_factory=time.monotonic)
+
+
+async def _close_quietly(smtp: aiosmtplib.SMTP) -> None:
+    try:
+        if smtp.is_connected:
+            await smtp.quit()
+    except Exception:
+        smtp.close()
+
+
+class SMTPPool:
+    def __init__(self, max_size: int, max_messages_per_connection: int, keepalive_interval: float, max_idle: float):
+        self.max_size = max(1, max_size)
+        self.max_messages_per_connection = max(1, max_messages_per_connection)
+        self.keepalive_interval = keepalive_interval
+        self.max_idle = max_idle
+        self.transport: Optional[Transport] = None
+        self.connections_opened = 0
+        self.messages_sent = 0
+        self._idle: List[_Connection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._keepalive_task: Optional[asyncio.Task] = None
+
+    def transports(self) -> List[Transport]:
+        """Transports to try, the one that worked last time first."""
+        if settings.SMTP_PORT == 465:
+            candidates = [(465, True)]  # SSL/TLS
+        elif settings.SMTP_PORT == 587:
+            candidates = [(465, True), (587, False)]  # Try SSL first, then STARTTLS
+        else:
+            candidates = [(settings.SMTP_PORT, False)]
+        if self.transport in candidates:
+            candidates.remove(self.transport)
+            candidates.insert(0, self.transport)
+        return candidates
+
+    def _bind_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Connections and the semaphore of a finished loop can't be reused
+            self._loop = loop
+            self._idle = []
+            self._keepalive_task = None
+            self._slots = asyncio.Semaphore(self.max_size)
+
+    async def _connect(self) -> _Connection:
+        last_error: Optional[Exception] = None
+        for port, use_tls in self.transports():
+            smtp = aiosmtplib.SMTP(hostname=settings.SMTP_HOST, port=port, use_tls=use_tls, timeout=20)
+            try:
+                logger.info(f"Attempting SMTP connection to {settings.SMTP_HOST}:{port} (TLS: {use_tls})")
+                await smtp.connect(timeout=20)
+                # For port 587, start TLS after connection
+                if port == 587 and not use_tls:
+                    try:
+                        await smtp.starttls(timeout=20)
+                    except Exception as tls_error:
+                        error_msg = str(tls_error).lower()
+                        if "already using tls" not in error_msg and "already using ssl" not in error_msg:
+                            raise
+                await smtp.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+            except Exception as e:
+                last_error = e
+                logger.warning(f"Failed to connect via port {port} (TLS: {use_tls}): {str(e)}")
+                await _close_quietly(smtp)
+                continue
+            if self.transport != (port, use_tls):
+                logger.info(f"Using SMTP transport {settings.SMTP_HOST}:{port} (TLS: {use_tls}) from now on")
+                self.transport = (port, use_tls)
+            self.connections_opened += 1
+            return _Connection(smtp=smtp, transport=(port, use_tls))
+        self.transport = None
+        raise EmailDeliveryError(str(last_error) if last_error else "All SMTP connection attempts failed") from last_error
+
+    async def _acquire(self) -> Tuple[_Connection, bool]:
+        """A live connection and whether it was reused from the pool."""
+        while self._idle:
+            conn = self._idle.pop()  # most recently used first
+            if time.monotonic() - conn.last_used < self.keepalive_interval:
+                return conn, True
+            try:
+                await conn.smtp.noop()
+                return conn, True
+            except Exception:
+                await _close_quietly(conn.smtp)
+        return await self._connect(), False
+
+    def _release(self, conn: _Connection) -> None:
+        if conn.sent >= self.max_messages_per_connection:
+            asyncio.ensure_future(_close_quietly(conn.smtp))
+            return
+        conn.last_used = time.monotonic()
+        self._idle.append(conn)
+        if self._keepalive_task is None or self._keepalive_task.done():
+            self._keepalive_task = asyncio.ensure_future(self._keepalive())
+
+    async def send_message(self, message: Message) -> None:
+        self._bind_loop()
+        async with self._slots:
+            conn, reused = await self._acquire()
+            try:
+                await conn.smtp.send_message(message)
+            except _STALE_CONNECTION_ERRORS:
+                await _close_quietly(conn.smtp)
+                if not reused:
+                    raise
+                logger.info("Pooled SMTP connection was closed by the server, reconnecting")
+                conn = await self._connect()
+                try:
+                    await conn.smtp.send_message(message)
+                except Exception:
+                    await _close_quietly(conn.smtp)
+                    raise
+            except Exception:
+                # The session state after a rejected message is unknown; don't reuse it
+                await _close_quietly(conn.smtp)
+                raise
+            conn.sent += 1
+            self.messages_sent += 1
+            self._release(conn)
+
+    async def _keepalive(self) -> None:
+        while self._idle:
+            await asyncio.sleep(self.keepalive_interval)
+            now = time.monotonic()
+            for conn in list(self._idle):
+                if conn not in self._idle:
+                    continue  # taken by a sender meanwhile
+                if now - conn.last_used >= self.max_idle:
+                    self._idle.remove(conn)
+                    await _close_quietly(conn.smtp)
+                    continue
+                self._idle.remove(conn)
+                try:
+                    await conn.smtp.noop()
+                except Exception:
+                    await _close_quietly(conn.smtp)
+                    continue
+                self._idle.append(conn)
+
+    async def close(self) -> None:
+        if self._keepalive_task is not None:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await _close_quietly(conn.smtp)
+
+    def stats(self) -> dict:
+        return {
+            "idle": len(self._idle),
+            "connections_opened": self.connections_opened,
+            "messages_sent": self.messages_sent,
+            "transport": self.transport,
+        }
+
+
+smtp_pool = SMTPPool(
+    max_size=settings.SMTP_POOL_SIZE,
+    max_messages_per_connection=settings.SMTP_POOL_MAX_MESSAGES_PER_CONNECTION,
+    keepalive_interval=settings.SMTP_POOL_KEEPALIVE_SECONDS,
+    max_idle=settings.SMTP_POOL_MAX_IDLE_SECONDS,
+)
+
+
+@REGISTRY.register_collector
+def _smtp_pool_metrics():
+    yield "smtp_pool_idle_connections", "gauge", "Authenticated SMTP connections waiting for a message", [({}, len(smtp_pool._idle))]
+    yield "smtp_connections_opened_total", "counter", "SMTP connections opened (TLS + AUTH)", [({}, smtp_pool.connections_opened)]
+    yield "smtp_messages_sent_total", "counter", "Messages accepted by the SMTP server", [({}, smtp_pool.messages_sent)]
@@ -1,8 +1,24 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+import hmac
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.responses import Response
+from starlette.responses import JSONResponse, PlainTextResponse, Response
 import logging
+from sqlalchemy import text
 from app.core.config import settings
+from app.core.database import AsyncSessionLocal, async_engine
+from app.core.db_pool import pool_stats
+from app.core.email_templates import email_templates
+from app.core.executor import ExecutorBusyError
+from app.core.http_client import close_http_client, get_http_client
+from app.core.metrics import REGISTRY
+from app.core.query_stats import QueryInspectorMiddleware
+from app.core.request_metrics import RequestMetricsMiddleware
+from app.core.security import password_hasher
+from app.core.smtp_pool import smtp_pool
+from app.services.email_outbox import email_outbox
+from app.services.progress_buffer import progress_buffer
+from app.services.token_revocation import load_revocations
 from app.api.v1 import security, courses, account, progress, resources, auth
 
 # Настройка логирования
@@ -11,12 +27,58 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+# Where /metrics and the /health/db pool details are served without METRICS_TOKEN
+OPEN_METRICS_ENVIRONMENTS = ("development", "test")
+
+
+def _metrics_served() -> bool:
+    return bool(settings.METRICS_TOKEN) or settings.ENVIRONMENT in OPEN_METRICS_ENVIRONMENTS
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile email templates now: a broken one fails startup, not a password reset
+    email_templates.load()
+    # Outbound HTTP (Google OAuth) shares one pooled client for the app's lifetime
+    get_http_client()
+    try:
+        async with AsyncSessionLocal() as db:
+            await load_revocations(db)
+    except Exception:
+        # Tokens revoked before this start stay valid until they expire
+        logging.getLogger(__name__).exception("Failed to load token revocations")
+    if settings.METRICS_ENABLED and not _metrics_served():
+        logging.getLogger(__name__).warning("METRICS_TOKEN is not set: /metrics is disabled")
+    if settings.PROGRESS_WRITE_BEHIND:
+        progress_buffer.start()
+    if settings.EMAIL_OUTBOX_WORKER_ENABLED:
+        email_outbox.start()
+    yield
+    await email_outbox.stop()
+    await smtp_pool.close()
+    await close_http_client()
+    # Persist buffered progress heartbeats before the worker exits
+    await progress_buffer.stop()
+    password_hasher.shutdown()
+
+
 app = FastAPI(
     title="Fortnite Course Platform API",
     description="API для образовательной платформы",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
+
+@app.exception_handler(ExecutorBusyError)
+async def executor_busy_handler(request: Request, exc: ExecutorBusyError):
+    # Пул bcrypt переполнен — просим клиента повторить позже
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
 # CORS — allow preflight OPTIONS; allow Render frontend by regex so origin always matches
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +90,18 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# SQL per request: X-DB-* headers in development, budgets and N+1 checks under tests
+app.add_middleware(
+    QueryInspectorMiddleware,
+    headers=settings.ENVIRONMENT == "development",
+    enforce=settings.ENVIRONMENT == "test",
+    repeated_limit=settings.SQL_REPEATED_STATEMENT_LIMIT,
+)
+
+# Added last so it wraps CORS too and sees every response
+if settings.METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+
 # Explicit OPTIONS handlers so preflight always gets 200 (CORS middleware adds headers)
 async def _options_ok():
     return Response(status_code=200)
@@ -59,3 +133,37 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+
+def _metrics_authorized(request: Request) -> bool:
+    # Пул, метрики и прочие внутренности — только для скрейпера с METRICS_TOKEN;
+    # без токена открыты лишь в development/test
+    if not settings.METRICS_TOKEN:
+        return _metrics_served()
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    return hmac.compare_digest(request.headers.get("authorization", ""), expected)
+
+
+@app.get("/health/db")
+async def db_pool_health(request: Request):
+    # Доступна ли БД; состояние пула API (занятые, overflow, время ожидания) — с токеном метрик
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception:
+        logging.getLogger(__name__).exception("Database health check failed")
+        return JSONResponse({"status": "down"}, status_code=503)
+    if not _metrics_authorized(request):
+        return {"status": "up"}
+    return {"status": "up", **pool_stats(async_engine.sync_engine)}
+
+
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics(request: Request):
+        # Метрики процесса в формате Prometheus (у каждого воркера свои)
+        if not _metrics_served():
+            # Без токена вне development/test метрики не отдаём вовсе
+            return Response(status_code=404)
+        if not _metrics_authorized(request):
+            return Response(status_code=401)
+        return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
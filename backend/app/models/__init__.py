@@ -1,8 +1,11 @@
 from app.models.user import User
 from app.models.course import Course, CourseModule, CourseLesson
 from app.models.progress import Progress
+from app.models.user_course_progress import UserCourseProgress
 from app.models.resource import CourseResource
 from app.models.password_reset import PasswordResetToken
+from app.models.email_outbox import EmailOutbox
+from app.models.email_campaign import EmailCampaign
 
 __all__ = [
     "User",
@@ -10,7 +13,10 @@ __all__ = [
     "CourseModule",
     "CourseLesson",
     "Progress",
+    "UserCourseProgress",
     "CourseResource",
     "PasswordResetToken",
+    "EmailOutbox",
+    "EmailCampaign",
 ]
 
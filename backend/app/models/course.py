@@ -1,7 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.core.database import Base
+from app.core.database import Base, LAZY_LOAD
 
 
 class Course(Base):
@@ -19,12 +19,16 @@ class Course(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    modules = relationship("CourseModule", back_populates="course", cascade="all, delete-orphan")
+    modules = relationship("CourseModule", back_populates="course", cascade="all, delete-orphan", order_by="CourseModule.order", lazy=LAZY_LOAD)
     resources = relationship("CourseResource", back_populates="course", cascade="all, delete-orphan")
 
 
 class CourseModule(Base):
     __tablename__ = "course_modules"
+    __table_args__ = (
+        # Modules of a course in display order (course tree, progress)
+        Index("ix_course_modules_course_id_order", "course_id", "order"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
@@ -35,11 +39,15 @@ class CourseModule(Base):
 
     # Relationships
     course = relationship("Course", back_populates="modules")
-    lessons = relationship("CourseLesson", back_populates="module", cascade="all, delete-orphan", order_by="CourseLesson.order")
+    lessons = relationship("CourseLesson", back_populates="module", cascade="all, delete-orphan", order_by="CourseLesson.order", lazy=LAZY_LOAD)
 
 
 class CourseLesson(Base):
     __tablename__ = "course_lessons"
+    __table_args__ = (
+        # Lessons of a module in display order (course tree, progress)
+        Index("ix_course_lessons_module_id_order", "module_id", "order"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     module_id = Column(Integer, ForeignKey("course_modules.id"), nullable=False)
@@ -52,5 +60,5 @@ class CourseLesson(Base):
 
     # Relationships
     module = relationship("CourseModule", back_populates="lessons")
-    progress = relationship("Progress", back_populates="lesson")
+    progress = relationship("Progress", back_populates="lesson", lazy=LAZY_LOAD)
 
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class EmailCampaign(Base):
+    """
+    A bulk email to all active users (app.services.announcements).
+
+    Stores the templates, so an interrupted campaign resumes with the same
+    content, and the checkpoint: every user with id <= last_user_id has been
+    handled.
+    """
+    __tablename__ = "email_campaigns"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False)
+    subject = Column(String, nullable=False)  # Jinja2 шаблоны, как и тела письма
+    html_template = Column(Text, nullable=False)
+    text_template = Column(Text, nullable=True)
+    status = Column(String, nullable=False, default="running")  # "running" или "completed"
+    last_user_id = Column(Integer, nullable=False, default=0)
+    sent = Column(Integer, nullable=False, default=0)
+    # Failed sends handed over to the email outbox for retries
+    deferred = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
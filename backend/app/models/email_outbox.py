@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class EmailOutbox(Base):
+    """
+    Emails waiting to be sent by the outbox worker (app.services.email_outbox).
+
+    Rows are written in the same transaction as whatever triggered the email
+    (e.g. a PasswordResetToken), so an email is queued if and only if that
+    change is committed.
+    """
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Worker claim: pending rows due for an attempt, oldest first
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    to_email = Column(String, nullable=False)
+    subject = Column(String, nullable=False)
+    html_body = Column(Text, nullable=False)
+    text_body = Column(Text, nullable=True)
+    status = Column(String, nullable=False, default="pending")  # "pending", "sent" или "failed"
+    attempts = Column(Integer, nullable=False, default=0)
+    # Earliest next delivery attempt; also the lease while a worker is sending
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True), nullable=True)
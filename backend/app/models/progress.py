@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -6,6 +6,10 @@ from app.core.database import Base
 
 class Progress(Base):
     __tablename__ = "progress"
+    __table_args__ = (
+        # One row per user and lesson — required by the upsert in update_progress
+        UniqueConstraint("user_id", "lesson_id", name="uq_progress_user_lesson"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
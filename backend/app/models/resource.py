@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -14,6 +14,10 @@ class ResourceType(str, enum.Enum):
 
 class CourseResource(Base):
     __tablename__ = "course_resources"
+    __table_args__ = (
+        # Resources of a course in display order
+        Index("ix_course_resources_course_id_order", "course_id", "order"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     course_id = Column(Integer, ForeignKey("courses.id"), nullable=False)
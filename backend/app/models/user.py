@@ -16,6 +16,7 @@ class User(Base):
     auth_provider = Column(String, default="email")  # "email" или "google"
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # Увеличивается, чтобы отозвать выданные токены
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
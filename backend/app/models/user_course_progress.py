@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+
+class UserCourseProgress(Base):
+    """
+    Per-user, per-course progress summary maintained incrementally from
+    `progress` writes (see app.services.progress_summary). Rebuild with
+    scripts/rebuild_progress_summary.py after changing lesson durations.
+    """
+    __tablename__ = "user_course_progress"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    course_id = Column(Integer, ForeignKey("courses.id"), primary_key=True)
+    watched_duration = Column(Integer, nullable=False, default=0)  # Sum of watched seconds, capped per lesson
+    completed_lessons = Column(Integer, nullable=False, default=0)  # Lessons watched >= 90%
+    last_activity_at = Column(DateTime(timezone=True), server_default=func.now())
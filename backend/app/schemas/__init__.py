@@ -1,6 +1,6 @@
 from app.schemas.user import UserCreate, UserResponse, UserLogin
 from app.schemas.course import CourseResponse, CourseListResponse, CourseDetailResponse
-from app.schemas.progress import ProgressResponse, ProgressUpdate
+from app.schemas.progress import ProgressResponse, ProgressUpdate, ProgressBatchUpdate, ProgressBatchResponse
 from app.schemas.resource import CourseResourceResponse
 
 __all__ = [
@@ -12,6 +12,8 @@ __all__ = [
     "CourseDetailResponse",
     "ProgressResponse",
     "ProgressUpdate",
+    "ProgressBatchUpdate",
+    "ProgressBatchResponse",
     "CourseResourceResponse",
 ]
 
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -21,6 +21,15 @@ class ProgressUpdate(BaseModel):
     is_completed: Optional[bool] = False
 
 
+class ProgressBatchUpdate(BaseModel):
+    items: List[ProgressUpdate] = Field(..., min_length=1, max_length=500)
+
+
+class ProgressBatchResponse(BaseModel):
+    progress: List[ProgressResponse]
+    unknown_lesson_ids: List[int]
+
+
 class CourseProgressResponse(BaseModel):
     course_id: int
     total_lessons: int
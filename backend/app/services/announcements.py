@@ -0,0 +1,308 @@
+"""
+Bulk announcement emails to every active user.
+
+run_campaign() streams users ordered by id through a server-side cursor
+(yield_per), reopened every `window` rows so neither memory nor the read
+transaction grows with the user table. A bounded queue feeds `concurrency`
+senders sharing a per-minute rate cap and the SMTP pool; subject and bodies
+are rendered per user from templates compiled once.
+
+Progress is checkpointed in EmailCampaign.last_user_id: every user up to it
+has been handled (senders finish out of order, so this trails the newest
+send). Running the campaign again resumes from there; users past the
+checkpoint who already got the email receive it again, at most
+concurrency + queue size of them.
+
+A failed send goes to the email outbox, which retries it with backoff, in the
+same transaction as the checkpoint. After max_consecutive_failures in a row
+(SMTP is down) the campaign stops and can be resumed later.
+"""
+import asyncio
+import logging
+import time
+from contextlib import aclosing
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Set, Tuple
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.email import deliver_email
+from app.core.email_templates import email_templates
+from app.models.email_campaign import EmailCampaign
+from app.models.user import User
+from app.services.email_outbox import email_outbox, enqueue_email
+
+logger = logging.getLogger(__name__)
+
+# Only what the templates need; full User objects would be identity-mapped
+RECIPIENT_COLUMNS = (User.id, User.email, User.username, User.full_name)
+
+class CampaignError(Exception):
+    """The campaign can't be started (missing content, conflicting content, already completed)."""
+
+
+class CampaignTemplates:
+    """
+    Subject, HTML and text templates compiled once, with email.css inlined
+    and base.html / base.txt available to extend. Variables: name (full name
+    or username), username, email.
+    """
+
+    def __init__(self, subject: str, html: str, text: Optional[str] = None):
+        self.subject = email_templates.compile_text(subject)
+        self.html = email_templates.compile_html(html)
+        self.text = email_templates.compile_text(text) if text else None
+
+    def render(self, recipient) -> Tuple[str, str, Optional[str]]:
+        context = {
+            "name": recipient.full_name or recipient.username,
+            "username": recipient.username,
+            "email": recipient.email,
+        }
+        return (
+            self.subject.render(context).strip(),
+            self.html.render(context),
+            self.text.render(context) if self.text else None,
+        )
+
+
+class RateLimiter:
+    """Spaces calls evenly so that at most `per_minute` start per minute; 0 disables."""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_at = 0.0
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        at = max(now, self._next_at)
+        self._next_at = at + self.interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+
+class _Checkpoint:
+    """Highest user id below which every queued user has been handled."""
+
+    def __init__(self, last_user_id: int):
+        self.last_queued = last_user_id
+        self.in_flight: Set[int] = set()
+
+    def queued(self, user_id: int) -> None:
+        self.in_flight.add(user_id)
+        self.last_queued = user_id
+
+    def done(self, user_id: int) -> None:
+        self.in_flight.discard(user_id)
+
+    @property
+    def user_id(self) -> int:
+        # Ids are queued in increasing order
+        return min(self.in_flight) - 1 if self.in_flight else self.last_queued
+
+
+@dataclass
+class CampaignResult:
+    sent: int
+    deferred: int
+    last_user_id: int
+    completed: bool
+    seconds: float
+
+
+async def get_or_create_campaign(
+    db: AsyncSession,
+    name: str,
+    subject: Optional[str] = None,
+    html_template: Optional[str] = None,
+    text_template: Optional[str] = None,
+    persist: bool = True,
+) -> EmailCampaign:
+    """
+    The campaign called `name`; created from the given content if new. With
+    persist=False (dry run) a new campaign is not saved.
+    """
+    campaign = (await db.execute(select(EmailCampaign).where(EmailCampaign.name == name))).scalar_one_or_none()
+    if campaign is not None:
+        given = {"subject": subject, "html_template": html_template, "text_template": text_template}
+        changed = [field for field, value in given.items() if value is not None and value != getattr(campaign, field)]
+        if changed:
+            raise CampaignError(f"Campaign '{name}' already exists with a different {', '.join(changed)}")
+        if campaign.status == "completed":
+            raise CampaignError(f"Campaign '{name}' was completed at {campaign.completed_at}")
+        return campaign
+
+    if not subject or not html_template:
+        raise CampaignError(f"Campaign '{name}' does not exist; a subject and an HTML template are required")
+    campaign = EmailCampaign(
+        name=name,
+        subject=subject,
+        html_template=html_template,
+        text_template=text_template,
+        status="running",
+        last_user_id=0,
+        sent=0,
+        deferred=0,
+    )
+    if persist:
+        db.add(campaign)
+        await db.commit()
+        await db.refresh(campaign)
+    return campaign
+
+
+async def count_recipients(after_user_id: int = 0) -> int:
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(func.count()).select_from(User).where(User.is_active == True, User.id > after_user_id)
+        )
+
+
+async def stream_recipients(after_user_id: int = 0, window: int = 5000, yield_per: int = 500) -> AsyncIterator:
+    """Active users with id > after_user_id in id order, as (id, email, username, full_name) rows."""
+    last_id = after_user_id
+    while True:
+        rows = 0
+        # A fresh cursor (and read transaction) per window instead of one open for hours
+        async with AsyncSessionLocal() as db:
+            stmt = (
+                select(*RECIPIENT_COLUMNS)
+                .where(User.is_active == True, User.id > last_id)
+                .order_by(User.id)
+                .limit(window)
+            )
+            async with aclosing(_fetch_window(db, stmt, yield_per)) as window_rows:
+                async for row in window_rows:
+                    rows += 1
+                    last_id = row.id
+                    yield row
+        if rows < window:
+            return
+
+
+async def _fetch_window(db: AsyncSession, stmt, yield_per: int) -> AsyncIterator:
+    if db.bind.dialect.name == "sqlite":
+        # An open SQLite cursor keeps a read lock that blocks the checkpoint
+        # writes; one window is small enough to fetch at once
+        for row in (await db.execute(stmt)).all():
+            yield row
+        return
+    result = await db.stream(stmt.execution_options(yield_per=yield_per))
+    try:
+        async for row in result:
+            yield row
+    finally:
+        # Close the server-side cursor before the session goes away
+        await result.close()
+
+
+async def run_campaign(
+    campaign: EmailCampaign,
+    concurrency: int = settings.SMTP_POOL_SIZE,
+    rate_per_minute: int = settings.ANNOUNCEMENT_RATE_PER_MINUTE,
+    dry_run: bool = False,
+    checkpoint_every: int = 100,
+    max_consecutive_failures: int = 20,
+    window: int = 5000,
+) -> CampaignResult:
+    """
+    Send `campaign` to every active user past its checkpoint. A dry run renders
+    every email but sends nothing, ignores the rate cap and writes nothing.
+    """
+    templates = CampaignTemplates(campaign.subject, campaign.html_template, campaign.text_template)
+    limiter = RateLimiter(0 if dry_run else rate_per_minute)
+    checkpoint = _Checkpoint(campaign.last_user_id)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    stop = asyncio.Event()
+    save_lock = asyncio.Lock()
+    deferred: List[Tuple[str, str, str, Optional[str]]] = []
+    sent, deferred_total = campaign.sent, campaign.deferred
+    consecutive_failures = 0
+    handled = 0
+    started_at = time.perf_counter()
+
+    total = await count_recipients(campaign.last_user_id)
+    logger.info(f"Campaign '{campaign.name}': {total} recipient(s) after user {campaign.last_user_id}")
+
+    async def save(completed: bool = False) -> None:
+        nonlocal deferred
+        if dry_run:
+            return
+        async with save_lock:
+            failed, deferred = deferred, []
+            values = {"last_user_id": checkpoint.user_id, "sent": sent, "deferred": deferred_total}
+            if completed:
+                values.update(status="completed", completed_at=datetime.now(timezone.utc))
+            async with AsyncSessionLocal() as db:
+                for to_email, subject, html_body, text_body in failed:
+                    enqueue_email(db, to_email, subject, html_body, text_body)
+                await db.execute(update(EmailCampaign).where(EmailCampaign.id == campaign.id).values(**values))
+                await db.commit()
+            if failed:
+                email_outbox.notify()
+
+    async def produce() -> None:
+        async with aclosing(stream_recipients(campaign.last_user_id, window)) as recipients:
+            async for recipient in recipients:
+                if stop.is_set():
+                    break
+                checkpoint.queued(recipient.id)
+                await queue.put(recipient)
+        for _ in range(concurrency):
+            await queue.put(None)
+
+    async def send() -> None:
+        nonlocal sent, deferred_total, consecutive_failures, handled
+        while (recipient := await queue.get()) is not None:
+            if stop.is_set():
+                continue  # left in flight, so the checkpoint stays before it
+            subject, html_body, text_body = templates.render(recipient)
+            if not dry_run:
+                await limiter.wait()
+                try:
+                    await deliver_email(recipient.email, subject, html_body, text_body)
+                    consecutive_failures = 0
+                    sent += 1
+                except Exception as exc:
+                    logger.warning(f"Announcement to {recipient.email} failed, queued for retry: {exc}")
+                    deferred.append((recipient.email, subject, html_body, text_body))
+                    deferred_total += 1
+                    consecutive_failures += 1
+                    if consecutive_failures >= max_consecutive_failures:
+                        logger.error(f"Campaign '{campaign.name}' stopped after {consecutive_failures} failures in a row")
+                        stop.set()
+            else:
+                sent += 1
+            checkpoint.done(recipient.id)
+            handled += 1
+            if handled % checkpoint_every == 0:
+                progress = f"{handled}/{total} handled, up to user {checkpoint.user_id}"
+                await save()
+                logger.info(f"Campaign '{campaign.name}': {progress}")
+
+    tasks = [asyncio.create_task(produce())] + [asyncio.create_task(send()) for _ in range(concurrency)]
+    completed = False
+    try:
+        await asyncio.gather(*tasks)
+        completed = not stop.is_set() and not checkpoint.in_flight
+    finally:
+        stop.set()
+        # Cancel until all have finished: asyncio.wait_for (used by aiosmtplib)
+        # can swallow a cancellation on Python 3.11
+        while pending := [task for task in tasks if not task.done()]:
+            for task in pending:
+                task.cancel()
+            await asyncio.wait(pending, timeout=1)
+        # Also on errors and Ctrl+C: keep what was done
+        await save(completed=completed)
+    return CampaignResult(
+        sent=sent,
+        deferred=deferred_total,
+        last_user_id=checkpoint.user_id,
+        completed=completed,
+        seconds=time.perf_counter() - started_at,
+    )
@@ -0,0 +1,84 @@
+"""
+Cache of serialized course catalog, course detail and course resource responses.
+
+Entries are keyed by the current content version, which is bumped whenever a
+Course, CourseModule, CourseLesson or CourseResource row is committed through
+an ORM session in this process (or explicitly via invalidate_course_content).
+Changes made from another process (e.g. scripts/init_db.py) are picked up
+once COURSE_CACHE_TTL_SECONDS elapses.
+"""
+import hashlib
+import logging
+from typing import Hashable, NamedTuple, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache, register_cache
+from app.core.config import settings
+from app.models.course import Course, CourseModule, CourseLesson
+from app.models.resource import CourseResource
+
+logger = logging.getLogger(__name__)
+
+_CONTENT_MODELS = (Course, CourseModule, CourseLesson, CourseResource)
+_SESSION_FLAG = "course_content_changed"
+
+course_cache = register_cache("course", TTLCache(
+    maxsize=settings.COURSE_CACHE_MAX_ENTRIES,
+    ttl=settings.COURSE_CACHE_TTL_SECONDS,
+))
+_content_version = 1
+
+
+def get_content_version() -> int:
+    return _content_version
+
+
+def invalidate_course_content() -> int:
+    """Bump the content version and drop every cached course response."""
+    global _content_version
+    _content_version += 1
+    course_cache.clear()
+    logger.info(f"Course content version bumped to {_content_version}")
+    return _content_version
+
+
+class CachedBody(NamedTuple):
+    etag: str
+    body: bytes
+
+
+def make_cached_body(body: bytes) -> CachedBody:
+    """Wrap serialized JSON together with its strong ETag (hash of the bytes)."""
+    return CachedBody(etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"', body=body)
+
+
+def cache_get(*key: Hashable) -> Optional[CachedBody]:
+    if not settings.COURSE_CACHE_ENABLED:
+        return None
+    return course_cache.get((_content_version,) + key)
+
+
+def cache_set(body: bytes, *key: Hashable) -> CachedBody:
+    entry = make_cached_body(body)
+    if settings.COURSE_CACHE_ENABLED:
+        course_cache.set((_content_version,) + key, entry)
+    return entry
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_content_change(session, flush_context):
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, _CONTENT_MODELS):
+            session.info[_SESSION_FLAG] = True
+            return
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_on_commit(session):
+    if session.info.pop(_SESSION_FLAG, False):
+        invalidate_course_content()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session):
+    session.info.pop(_SESSION_FLAG, None)
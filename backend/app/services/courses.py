@@ -0,0 +1,23 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.models.course import Course, CourseModule
+
+
+async def load_course_tree(
+    db: AsyncSession,
+    course_id: int,
+    active_only: bool = True,
+) -> Optional[Course]:
+    """
+    Load a course with its modules and lessons in a fixed number of queries
+    (course, modules, lessons), both ordered by their `order` column.
+    """
+    stmt = select(Course).where(Course.id == course_id).options(
+        selectinload(Course.modules).selectinload(CourseModule.lessons)
+    )
+    if active_only:
+        stmt = stmt.where(Course.is_active == True)
+    result = await db.execute(stmt)
+    return result.scalar_one_or_none()
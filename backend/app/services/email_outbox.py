@@ -0,0 +1,206 @@
+"""
+Transactional email outbox.
+
+enqueue_email() adds an EmailOutbox row to the caller's session, so the email
+is committed (or rolled back) together with the change that triggered it; the
+HTTP request never waits for SMTP. EmailOutboxWorker delivers due rows:
+
+- claim: one UPDATE ... WHERE id IN (SELECT ... LIMIT n FOR UPDATE SKIP LOCKED)
+  RETURNING, which bumps attempts and pushes next_attempt_at one lease into
+  the future. Concurrent workers (several uvicorn processes,
+  scripts/email_worker.py) skip each other's rows, and a worker that dies
+  mid-send only delays its rows until the lease expires. SQLite has no SKIP
+  LOCKED; the single statement is atomic there anyway.
+- send outside of any transaction (deliver_email may take 40 s on a bad
+  network), at most EMAIL_OUTBOX_CONCURRENCY at a time. A batch can wait
+  longer than one lease for its turn, so each row's lease is renewed right
+  before its send; a row whose lease was already taken over is skipped;
+- record "sent", or schedule a retry with exponential backoff, or give up
+  as "failed" after EMAIL_OUTBOX_MAX_ATTEMPTS.
+
+Renewals and results are fenced on the attempts value the claim returned:
+once another worker has re-claimed a row (bumping attempts), the old owner
+can't touch it. Delivery is at-least-once: a send that succeeds just before
+the process dies, or outlives its lease, is sent again.
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.email import deliver_email
+from app.core.metrics import Counter
+from app.models.email_outbox import EmailOutbox
+
+logger = logging.getLogger(__name__)
+
+email_outbox_deliveries_total = Counter(
+    "email_outbox_deliveries_total", "Outbox delivery attempts by outcome", ("outcome",)
+)
+
+
+# _send() result for an email whose lease another worker took over before the send
+LEASE_LOST = object()
+
+
+def enqueue_email(db: AsyncSession, to_email: str, subject: str, html_body: str, text_body: Optional[str] = None) -> EmailOutbox:
+    """Queue an email in the caller's transaction; call email_outbox.notify() after commit."""
+    email = EmailOutbox(
+        to_email=to_email,
+        subject=subject,
+        html_body=html_body,
+        text_body=text_body,
+        status="pending",
+        attempts=0,
+        next_attempt_at=datetime.now(timezone.utc),
+    )
+    db.add(email)
+    return email
+
+
+def retry_delay(attempts: int) -> float:
+    """Seconds before the next attempt after `attempts` failures (doubling, capped, +-10% jitter)."""
+    delay = min(settings.EMAIL_OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.EMAIL_OUTBOX_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.9, 1.1)
+
+
+class EmailOutboxWorker:
+    def __init__(self, poll_interval: float, batch_size: int, concurrency: int):
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self) -> None:
+        """Deliver right away instead of at the next poll (same process only)."""
+        self._wakeup.set()
+
+    async def claim(self) -> List[EmailOutbox]:
+        now = datetime.now(timezone.utc)
+        due = (
+            select(EmailOutbox.id)
+            .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(self.batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(EmailOutbox)
+                .where(EmailOutbox.id.in_(due.scalar_subquery()))
+                .values(
+                    attempts=EmailOutbox.attempts + 1,
+                    next_attempt_at=now + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS),
+                )
+                .returning(EmailOutbox)
+                .execution_options(synchronize_session=False)
+            )
+            emails = list(result.scalars())
+            await db.commit()
+        return emails
+
+    @staticmethod
+    def _owned(email: EmailOutbox):
+        """Condition that still holds while this worker's claim on email is current."""
+        return (EmailOutbox.id == email.id) & (EmailOutbox.attempts == email.attempts) & (EmailOutbox.status == "pending")
+
+    async def renew_lease(self, email: EmailOutbox) -> bool:
+        """Push the lease one full period out; False when another worker has re-claimed the email."""
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(EmailOutbox)
+                .where(self._owned(email))
+                .values(next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        return result.rowcount == 1
+
+    async def _send(self, email: EmailOutbox, semaphore: asyncio.Semaphore) -> Optional[object]:
+        """None once sent, the error message on failure, LEASE_LOST when skipped."""
+        async with semaphore:
+            # The batch was claimed at once; this row may have waited most of its lease
+            if not await self.renew_lease(email):
+                logger.warning(f"Lease on email {email.id} expired before sending; another worker has it")
+                return LEASE_LOST
+            try:
+                await deliver_email(email.to_email, email.subject, email.html_body, email.text_body)
+                return None
+            except Exception as exc:
+                return str(exc) or type(exc).__name__
+
+    async def deliver_due(self) -> int:
+        """Claim and send one batch; returns how many emails were claimed."""
+        emails = await self.claim()
+        if not emails:
+            return 0
+        semaphore = asyncio.Semaphore(self.concurrency)
+        errors = await asyncio.gather(*(self._send(email, semaphore) for email in emails))
+
+        now = datetime.now(timezone.utc)
+        async with AsyncSessionLocal() as db:
+            for email, error in zip(emails, errors):
+                if error is LEASE_LOST:
+                    continue
+                if error is None:
+                    values = {"status": "sent", "sent_at": now, "last_error": None}
+                    outcome = "sent"
+                elif email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                    values = {"status": "failed", "last_error": error}
+                    outcome = "failed"
+                    logger.error(f"Giving up on email {email.id} to {email.to_email} after {email.attempts} attempt(s): {error}")
+                else:
+                    values = {"next_attempt_at": now + timedelta(seconds=retry_delay(email.attempts)), "last_error": error}
+                    outcome = "retry"
+                    logger.warning(f"Email {email.id} to {email.to_email} failed (attempt {email.attempts}), will retry: {error}")
+                result = await db.execute(
+                    update(EmailOutbox).where(self._owned(email)).values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+                if result.rowcount == 0:
+                    # The send outlived the lease and another worker re-claimed the row
+                    outcome = "lease_lost"
+                    logger.warning(f"Lease on email {email.id} expired during the send; leaving it to the new owner")
+                email_outbox_deliveries_total.inc(outcome=outcome)
+            await db.commit()
+        return len(emails)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                # Keep going while full batches come back; otherwise wait for a notify or the next poll
+                while await self.deliver_due() >= self.batch_size:
+                    pass
+            except Exception:
+                logger.exception("Email outbox delivery failed")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        # Emails being sent right now are retried after their lease expires
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+email_outbox = EmailOutboxWorker(
+    poll_interval=settings.EMAIL_OUTBOX_POLL_SECONDS,
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    concurrency=settings.EMAIL_OUTBOX_CONCURRENCY,
+)
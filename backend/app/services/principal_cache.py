@@ -0,0 +1,90 @@
+"""
+Cache of authenticated principals for get_current_user.
+
+Holds a lightweight snapshot of the user (id, email, is_active, is_superuser)
+keyed by user id, so authenticated requests such as progress heartbeats don't
+re-read the users row every time (tokens carrying profile claims skip even
+that, see get_current_user). An entry is dropped when a User row is
+changed or deleted through an ORM session in this process, and explicitly on
+password reset and Google account linking. Changes made from another process
+are picked up once PRINCIPAL_CACHE_TTL_SECONDS elapses.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache, register_cache
+from app.core.config import settings
+from app.models.user import User
+
+_SESSION_KEY = "changed_user_ids"
+
+principal_cache = register_cache("principal", TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+))
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    is_active: bool
+    is_superuser: bool
+    token_version: int = 0
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+            token_version=user.token_version or 0,
+        )
+
+    @classmethod
+    def from_claims(cls, user_id: int, payload: Dict[str, Any]) -> "Principal":
+        """Built from the profile claims of create_user_access_token (no database)"""
+        return cls(
+            id=user_id,
+            email=payload["email"],
+            is_active=bool(payload["active"]),
+            is_superuser=bool(payload.get("su", False)),
+            token_version=payload.get("ver", 0),
+        )
+
+
+def get_cached_principal(user_id: int) -> Optional[Principal]:
+    if not settings.PRINCIPAL_CACHE_ENABLED:
+        return None
+    return principal_cache.get(user_id)
+
+
+def cache_principal(user: User) -> Principal:
+    principal = Principal.from_user(user)
+    if settings.PRINCIPAL_CACHE_ENABLED:
+        principal_cache.set(user.id, principal)
+    return principal
+
+
+def invalidate_principal(user_id: int) -> None:
+    principal_cache.pop(user_id)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session, flush_context):
+    for obj in (*session.dirty, *session.deleted):
+        if isinstance(obj, User) and obj.id is not None:
+            session.info.setdefault(_SESSION_KEY, set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    for user_id in session.info.pop(_SESSION_KEY, ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
@@ -0,0 +1,156 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+from sqlalchemy import and_, case, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.course import Course, CourseLesson, CourseModule
+from app.models.progress import Progress
+from app.schemas.progress import CourseProgressResponse
+
+
+def dialect_ops(dialect_name: str):
+    """insert() with ON CONFLICT support plus the greatest/least functions for the dialect."""
+    if dialect_name == "postgresql":
+        return postgresql.insert, func.greatest, func.least
+    if dialect_name == "sqlite":
+        # SQLite's multi-argument max()/min() are scalar, same as GREATEST/LEAST
+        return sqlite.insert, func.max, func.min
+    raise NotImplementedError(f"Progress upsert is not supported for dialect {dialect_name!r}")
+
+
+def cap_watched_duration(watched_duration: int, video_duration: Optional[int]) -> int:
+    """Cap watched time to video duration (never exceed video length)."""
+    return min(watched_duration, video_duration) if video_duration else watched_duration
+
+
+def lesson_counts_as_completed(capped_watched: int, video_duration: Optional[int]) -> bool:
+    """A lesson is completed once 90% is watched (10 * watched >= 9 * duration, exact in ints)."""
+    return bool(video_duration) and 10 * capped_watched >= 9 * video_duration
+
+
+def effective_watched_expr(least):
+    """SQL: per-lesson watched time capped at video_duration (0 when there is no progress row)."""
+    watched = func.coalesce(Progress.watched_duration, 0)
+    return case(
+        (Progress.id.is_(None), 0),
+        (func.coalesce(CourseLesson.video_duration, 0) > 0,
+         least(watched, CourseLesson.video_duration)),
+        else_=watched,
+    )
+
+
+def completed_expr(least):
+    """SQL: 1 if the lesson counts as completed (see lesson_counts_as_completed), else 0."""
+    watched = func.coalesce(Progress.watched_duration, 0)
+    return case(
+        (and_(Progress.id.isnot(None),
+              func.coalesce(CourseLesson.video_duration, 0) > 0,
+              10 * least(watched, CourseLesson.video_duration) >= 9 * CourseLesson.video_duration), 1),
+        else_=0,
+    )
+
+
+def upsert_progress_stmt(dialect_name: str, rows: List[Dict[str, Any]]):
+    """
+    INSERT rows ON CONFLICT (user_id, lesson_id) DO UPDATE.
+
+    `rows` are dicts of user_id, lesson_id, watched_duration, is_completed
+    (already capped, unique per user/lesson). Watched time only grows and
+    is_completed is sticky.
+    """
+    insert, greatest, _ = dialect_ops(dialect_name)
+    stmt = insert(Progress).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[Progress.user_id, Progress.lesson_id],
+        set_={
+            "watched_duration": greatest(
+                func.coalesce(Progress.watched_duration, 0), stmt.excluded.watched_duration
+            ),
+            "is_completed": func.coalesce(Progress.is_completed, False) | stmt.excluded.is_completed,
+            "last_watched_at": func.now(),
+        },
+    ).returning(*Progress.__table__.c)
+
+
+async def upsert_progress_rows(db: AsyncSession, rows: List[Dict[str, Any]]) -> List[Mapping[str, Any]]:
+    """Bulk-upsert pre-capped progress rows in one statement; returns the resulting rows."""
+    if not rows:
+        return []
+    result = await db.execute(upsert_progress_stmt(db.bind.dialect.name, rows))
+    return result.mappings().all()
+
+
+def course_progress_stmt(dialect_name: str, user_id: int):
+    """
+    Per-course totals for one user, grouped by course_id; courses without
+    lessons still get a row of zeros. Watched time is capped per lesson and
+    completion uses the 90% rule (effective_watched_expr / completed_expr).
+    """
+    _, _, least = dialect_ops(dialect_name)
+    return (
+        select(
+            Course.id.label("course_id"),
+            func.count(CourseLesson.id).label("total_lessons"),
+            func.coalesce(func.sum(completed_expr(least)), 0).label("completed_lessons"),
+            func.coalesce(func.sum(func.coalesce(CourseLesson.video_duration, 0)), 0).label("total_duration"),
+            func.coalesce(func.sum(effective_watched_expr(least)), 0).label("watched_duration"),
+        )
+        .select_from(Course)
+        .outerjoin(CourseModule, CourseModule.course_id == Course.id)
+        .outerjoin(CourseLesson, CourseLesson.module_id == CourseModule.id)
+        .outerjoin(Progress, and_(Progress.lesson_id == CourseLesson.id, Progress.user_id == user_id))
+        .group_by(Course.id)
+        .order_by(Course.id)
+    )
+
+
+def _row_to_progress(row: Mapping[str, Any]) -> CourseProgressResponse:
+    return build_course_progress(
+        row["course_id"],
+        total_lessons=int(row["total_lessons"]),
+        completed_lessons=int(row["completed_lessons"]),
+        total_duration=int(row["total_duration"]),
+        watched_duration=int(row["watched_duration"]),
+    )
+
+
+def build_course_progress(
+    course_id: int,
+    total_lessons: int = 0,
+    completed_lessons: int = 0,
+    total_duration: int = 0,
+    watched_duration: int = 0,
+) -> CourseProgressResponse:
+    # Прогресс курса = сумма просмотренного времени / общая длительность, не более 100%
+    progress_percentage = (
+        (watched_duration / total_duration * 100) if total_duration > 0 else 0.0
+    )
+    return CourseProgressResponse(
+        course_id=course_id,
+        total_lessons=total_lessons,
+        completed_lessons=completed_lessons,
+        total_duration=total_duration,
+        watched_duration=watched_duration,
+        progress_percentage=round(min(100.0, progress_percentage), 2),
+    )
+
+
+async def compute_course_progress(db: AsyncSession, user_id: int, course_id: int) -> CourseProgressResponse:
+    """Course progress for one user in a single aggregate query (zeros for unknown courses)."""
+    stmt = course_progress_stmt(db.bind.dialect.name, user_id).where(Course.id == course_id)
+    row = (await db.execute(stmt)).mappings().first()
+    if row is None:
+        return build_course_progress(course_id)
+    return _row_to_progress(row)
+
+
+async def compute_all_course_progress(
+    db: AsyncSession,
+    user_id: int,
+    course_ids: Optional[Sequence[int]] = None,
+) -> List[CourseProgressResponse]:
+    """Progress for every active course (optionally only course_ids) in one grouped query."""
+    stmt = course_progress_stmt(db.bind.dialect.name, user_id).where(Course.is_active == True)
+    if course_ids:
+        stmt = stmt.where(Course.id.in_(course_ids))
+    result = await db.execute(stmt)
+    return [_row_to_progress(row) for row in result.mappings()]
@@ -0,0 +1,217 @@
+"""
+Write-behind buffer for video progress heartbeats.
+
+The player posts /progress/update every few seconds. The first heartbeat for a
+(user_id, lesson_id) goes straight to the database (to validate the lesson and
+learn its video_duration); later ones only update the in-memory entry, keeping
+the max watched_duration and a sticky is_completed. Dirty entries are written
+in one bulk upsert every PROGRESS_FLUSH_INTERVAL_SECONDS, as soon as
+PROGRESS_FLUSH_MAX_DIRTY entries are pending, and on shutdown.
+
+Heartbeats that don't increase watched time (or complete the lesson) never
+make an entry dirty, so they never reach the database. Aggregates read from
+the progress table (account progress) may lag by up to one flush interval.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, Mapping, Optional, Tuple
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.metrics import REGISTRY
+from app.services.progress import cap_watched_duration
+from app.services.progress_summary import load_lesson_info, write_progress
+
+logger = logging.getLogger(__name__)
+
+Key = Tuple[int, int]
+
+
+@dataclass
+class BufferedProgress:
+    id: int
+    user_id: int
+    lesson_id: int
+    watched_duration: int
+    is_completed: bool
+    last_watched_at: datetime
+    video_duration: Optional[int]
+    dirty: bool = False
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "user_id": self.user_id,
+            "lesson_id": self.lesson_id,
+            "watched_duration": self.watched_duration,
+            "is_completed": self.is_completed,
+            "last_watched_at": self.last_watched_at,
+        }
+
+
+class ProgressBuffer:
+    def __init__(self, flush_interval: float, max_dirty: int, max_entries: int):
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Key, BufferedProgress]" = OrderedDict()
+        self._dirty = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+        self.coalesced = 0
+        self.flushed_rows = 0
+
+    def get(self, user_id: int, lesson_id: int) -> Optional[BufferedProgress]:
+        entry = self._entries.get((user_id, lesson_id))
+        if entry is not None:
+            self._entries.move_to_end((user_id, lesson_id))
+        return entry
+
+    def get_dirty(self, user_id: int, lesson_id: int) -> Optional[BufferedProgress]:
+        entry = self._entries.get((user_id, lesson_id))
+        return entry if entry is not None and entry.dirty else None
+
+    def seed(self, row: Mapping[str, Any], video_duration: Optional[int]) -> BufferedProgress:
+        """Remember a row that was just written to the database (clean entry)."""
+        existing = self._entries.get((row["user_id"], row["lesson_id"]))
+        if existing is not None:
+            # A concurrent first heartbeat got here first; keep the newer state
+            existing.video_duration = video_duration
+            return self.record(existing, row["watched_duration"] or 0, bool(row["is_completed"]))
+        entry = BufferedProgress(
+            id=row["id"],
+            user_id=row["user_id"],
+            lesson_id=row["lesson_id"],
+            watched_duration=row["watched_duration"] or 0,
+            is_completed=bool(row["is_completed"]),
+            last_watched_at=row["last_watched_at"],
+            video_duration=video_duration,
+        )
+        self._entries[(entry.user_id, entry.lesson_id)] = entry
+        self._trim()
+        return entry
+
+    def record(self, entry: BufferedProgress, watched_duration: int, is_completed: bool) -> BufferedProgress:
+        """Apply a heartbeat to a buffered entry without touching the database."""
+        watched_duration = cap_watched_duration(watched_duration, entry.video_duration)
+        changed = False
+        if watched_duration > entry.watched_duration:
+            entry.watched_duration = watched_duration
+            changed = True
+        if is_completed and not entry.is_completed:
+            entry.is_completed = True
+            changed = True
+        if not changed:
+            self.coalesced += 1
+            return entry
+        entry.last_watched_at = datetime.now(timezone.utc)
+        if not entry.dirty:
+            entry.dirty = True
+            self._dirty += 1
+            if self._dirty >= self.max_dirty:
+                self._wakeup.set()
+        else:
+            self.coalesced += 1
+        return entry
+
+    def _trim(self) -> None:
+        # Drop least recently used clean entries; dirty ones wait for a flush
+        if len(self._entries) <= self.max_entries:
+            return
+        for key in list(self._entries):
+            if len(self._entries) <= self.max_entries:
+                break
+            if not self._entries[key].dirty:
+                del self._entries[key]
+
+    async def flush(self) -> int:
+        """Write all dirty entries in one bulk upsert."""
+        async with self._flush_lock:
+            pending = [entry for entry in self._entries.values() if entry.dirty]
+            if not pending:
+                return 0
+            rows = [
+                {
+                    "user_id": entry.user_id,
+                    "lesson_id": entry.lesson_id,
+                    "watched_duration": entry.watched_duration,
+                    "is_completed": entry.is_completed,
+                }
+                for entry in pending
+            ]
+            # Mark clean before awaiting: heartbeats arriving during the write
+            # re-dirty their entry and go out with the next flush.
+            for entry in pending:
+                entry.dirty = False
+            self._dirty -= len(pending)
+            try:
+                async with AsyncSessionLocal() as db:
+                    lessons = await load_lesson_info(db, [row["lesson_id"] for row in rows])
+                    # Skip lessons deleted since they were buffered
+                    await write_progress(db, [row for row in rows if row["lesson_id"] in lessons], lessons)
+                    await db.commit()
+            except Exception:
+                logger.exception(f"Failed to flush {len(rows)} buffered progress row(s)")
+                for entry in pending:
+                    if not entry.dirty:
+                        entry.dirty = True
+                        self._dirty += 1
+                raise
+            self.flushed_rows += len(rows)
+            self._trim()
+            logger.debug(f"Flushed {len(rows)} buffered progress row(s)")
+            return len(rows)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                # Already logged; entries stay dirty and are retried next tick
+                pass
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "dirty": self._dirty,
+            "coalesced": self.coalesced,
+            "flushed_rows": self.flushed_rows,
+        }
+
+
+progress_buffer = ProgressBuffer(
+    flush_interval=settings.PROGRESS_FLUSH_INTERVAL_SECONDS,
+    max_dirty=settings.PROGRESS_FLUSH_MAX_DIRTY,
+    max_entries=settings.PROGRESS_BUFFER_MAX_ENTRIES,
+)
+
+
+@REGISTRY.register_collector
+def _progress_buffer_metrics():
+    stats = progress_buffer.stats()
+    yield "progress_buffer_entries", "gauge", "Progress rows held in memory", [({}, stats["entries"])]
+    yield "progress_buffer_dirty", "gauge", "Progress rows waiting for a flush", [({}, stats["dirty"])]
+    yield "progress_buffer_coalesced_total", "counter", "Heartbeats absorbed without a DB write", [({}, stats["coalesced"])]
+    yield "progress_buffer_flushed_rows_total", "counter", "Progress rows written by flushes", [({}, stats["flushed_rows"])]
@@ -0,0 +1,323 @@
+"""
+Incrementally maintained user_course_progress summary.
+
+Every progress write goes through write_progress(), which applies the change
+in watched seconds / completed lessons (old row vs new row) to the user's
+summary row for that course in the same transaction. Reading course progress
+is then a primary-key lookup plus per-course totals (lesson count, total
+duration) that are cached per content version.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+from sqlalchemy import and_, delete, false, func, insert, select, text, union, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.cache import TTLCache, register_cache
+from app.core.config import settings
+from app.models.course import Course, CourseLesson, CourseModule
+from app.models.progress import Progress
+from app.models.user import User
+from app.models.user_course_progress import UserCourseProgress
+from app.schemas.progress import CourseProgressResponse
+from app.services.course_cache import get_content_version
+from app.services.progress import (
+    build_course_progress,
+    cap_watched_duration,
+    completed_expr,
+    dialect_ops,
+    effective_watched_expr,
+    lesson_counts_as_completed,
+    upsert_progress_rows,
+    upsert_progress_stmt,
+)
+
+# First key of the two-int pg_advisory_xact_lock(namespace, user_id)
+_ADVISORY_LOCK_NAMESPACE = 0x5043
+
+_course_totals = register_cache("course_totals", TTLCache(maxsize=1024, ttl=settings.COURSE_CACHE_TTL_SECONDS))
+
+
+@dataclass(frozen=True)
+class LessonInfo:
+    course_id: int
+    video_duration: Optional[int]
+
+
+async def load_lesson_info(db: AsyncSession, lesson_ids: Sequence[int]) -> Dict[int, LessonInfo]:
+    """course_id and video_duration for each existing lesson id, in one query."""
+    if not lesson_ids:
+        return {}
+    result = await db.execute(
+        select(CourseLesson.id, CourseModule.course_id, CourseLesson.video_duration)
+        .join(CourseModule, CourseModule.id == CourseLesson.module_id)
+        .where(CourseLesson.id.in_(set(lesson_ids)))
+    )
+    return {lesson_id: LessonInfo(course_id, duration) for lesson_id, course_id, duration in result}
+
+
+def _summary_upsert_stmt(dialect_name: str, rows: List[Dict[str, Any]]):
+    insert, greatest, _ = dialect_ops(dialect_name)
+    stmt = insert(UserCourseProgress).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserCourseProgress.user_id, UserCourseProgress.course_id],
+        set_={
+            "watched_duration": UserCourseProgress.watched_duration + stmt.excluded.watched_duration,
+            "completed_lessons": UserCourseProgress.completed_lessons + stmt.excluded.completed_lessons,
+            "last_activity_at": greatest(
+                func.coalesce(UserCourseProgress.last_activity_at, stmt.excluded.last_activity_at),
+                stmt.excluded.last_activity_at,
+            ),
+        },
+    )
+
+
+def summary_deltas(
+    progress: Sequence[Mapping[str, Any]],
+    old_watched: Dict[Tuple[int, int], int],
+    lessons: Dict[int, LessonInfo],
+) -> List[Dict[str, Any]]:
+    """
+    user_course_progress increments for upserted progress rows, given each
+    row's watched time before the upsert (missing = no row yet).
+    """
+    deltas: Dict[Tuple[int, int], Dict[str, Any]] = {}
+    for row in progress:
+        lesson = lessons[row["lesson_id"]]
+        before = cap_watched_duration(old_watched.get((row["user_id"], row["lesson_id"]), 0), lesson.video_duration)
+        after = cap_watched_duration(row["watched_duration"] or 0, lesson.video_duration)
+        delta = deltas.setdefault(
+            (row["user_id"], lesson.course_id),
+            {
+                "user_id": row["user_id"],
+                "course_id": lesson.course_id,
+                "watched_duration": 0,
+                "completed_lessons": 0,
+                "last_activity_at": row["last_watched_at"],
+            },
+        )
+        delta["watched_duration"] += after - before
+        delta["completed_lessons"] += (
+            int(lesson_counts_as_completed(after, lesson.video_duration))
+            - int(lesson_counts_as_completed(before, lesson.video_duration))
+        )
+        delta["last_activity_at"] = max(delta["last_activity_at"], row["last_watched_at"])
+    return list(deltas.values())
+
+
+def summary_lock_stmt(user_ids: Iterable[int]):
+    """
+    Postgres: take the per-user transaction advisory locks that serialise
+    summary writers (write_progress, the rebuild script), in id order.
+    """
+    return text(
+        "SELECT pg_advisory_xact_lock(:ns, uid) "
+        "FROM (SELECT unnest(CAST(:uids AS integer[])) AS uid ORDER BY 1) AS ordered"
+    ).bindparams(ns=_ADVISORY_LOCK_NAMESPACE, uids=sorted(set(user_ids)))
+
+
+def _old_watched_select(rows: List[Dict[str, Any]]):
+    # Two plain IN lists use uq_progress_user_lesson on every dialect (a
+    # row-value IN doesn't on SQLite); rows are almost always for one user
+    return (
+        select(Progress.user_id, Progress.lesson_id, Progress.watched_duration)
+        .where(Progress.user_id.in_({row["user_id"] for row in rows}))
+        .where(Progress.lesson_id.in_({row["lesson_id"] for row in rows}))
+    )
+
+
+async def write_progress(
+    db: AsyncSession,
+    rows: List[Dict[str, Any]],
+    lessons: Dict[int, LessonInfo],
+) -> List[Mapping[str, Any]]:
+    """
+    Upsert capped progress rows (see upsert_progress_rows) and apply the
+    resulting deltas to user_course_progress. `lessons` must cover every
+    lesson_id in rows. Caller commits.
+    """
+    if not settings.PROGRESS_SUMMARY_ENABLED or not rows:
+        return await upsert_progress_rows(db, rows)
+
+    dialect_name = db.bind.dialect.name
+    if dialect_name == "postgresql":
+        # Serialise per user so the "old" values below are the committed ones
+        await db.execute(summary_lock_stmt({row["user_id"] for row in rows}))
+        # Old values come from the same statement as the upsert: its CTEs all
+        # read the snapshot taken before the upsert
+        old_stmt = _old_watched_select(rows).cte("old")
+        upserted = upsert_progress_stmt(dialect_name, rows).cte("upserted")
+        result = await db.execute(
+            select(upserted, old_stmt.c.watched_duration.label("old_watched_duration"))
+            .outerjoin(old_stmt, and_(old_stmt.c.user_id == upserted.c.user_id,
+                                      old_stmt.c.lesson_id == upserted.c.lesson_id))
+        )
+        progress, old_watched = [], {}
+        for row in result.mappings():
+            row = dict(row)
+            old = row.pop("old_watched_duration")
+            if old is not None:
+                old_watched[(row["user_id"], row["lesson_id"])] = old
+            progress.append(row)
+    else:
+        if dialect_name == "sqlite":
+            # A no-op write takes SQLite's single write lock before the read below
+            await db.execute(update(UserCourseProgress).where(false()).values(watched_duration=0))
+        result = await db.execute(_old_watched_select(rows))
+        old_watched = {(user_id, lesson_id): watched or 0 for user_id, lesson_id, watched in result}
+        progress = await upsert_progress_rows(db, rows)
+
+    deltas = summary_deltas(progress, old_watched, lessons)
+    await db.execute(_summary_upsert_stmt(dialect_name, deltas))
+    return progress
+
+
+async def _load_course_totals(db: AsyncSession, course_ids: Sequence[int]) -> Dict[int, Tuple[int, int]]:
+    """(total_lessons, total_duration) per course, cached until course content changes."""
+    version = get_content_version()
+    totals: Dict[int, Tuple[int, int]] = {}
+    missing = []
+    for course_id in course_ids:
+        cached = _course_totals.get((version, course_id))
+        if cached is None:
+            missing.append(course_id)
+        else:
+            totals[course_id] = cached
+    if missing:
+        result = await db.execute(
+            select(
+                CourseModule.course_id,
+                func.count(CourseLesson.id),
+                func.coalesce(func.sum(func.coalesce(CourseLesson.video_duration, 0)), 0),
+            )
+            .join(CourseLesson, CourseLesson.module_id == CourseModule.id)
+            .where(CourseModule.course_id.in_(missing))
+            .group_by(CourseModule.course_id)
+        )
+        found = {course_id: (int(lessons), int(duration)) for course_id, lessons, duration in result}
+        for course_id in missing:
+            totals[course_id] = found.get(course_id, (0, 0))
+            _course_totals.set((version, course_id), totals[course_id])
+    return totals
+
+
+async def read_course_progress(db: AsyncSession, user_id: int, course_id: int) -> CourseProgressResponse:
+    """Course progress from the summary row (primary-key lookup)."""
+    summary = await db.get(UserCourseProgress, (user_id, course_id))
+    total_lessons, total_duration = (await _load_course_totals(db, [course_id]))[course_id]
+    return build_course_progress(
+        course_id,
+        total_lessons=total_lessons,
+        completed_lessons=summary.completed_lessons if summary else 0,
+        total_duration=total_duration,
+        watched_duration=summary.watched_duration if summary else 0,
+    )
+
+
+async def read_all_course_progress(
+    db: AsyncSession,
+    user_id: int,
+    course_ids: Optional[Sequence[int]] = None,
+) -> List[CourseProgressResponse]:
+    """Progress for every active course (optionally only course_ids) from the summary table."""
+    stmt = (
+        select(Course.id, UserCourseProgress.watched_duration, UserCourseProgress.completed_lessons)
+        .outerjoin(
+            UserCourseProgress,
+            and_(UserCourseProgress.course_id == Course.id, UserCourseProgress.user_id == user_id),
+        )
+        .where(Course.is_active == True)
+        .order_by(Course.id)
+    )
+    if course_ids:
+        stmt = stmt.where(Course.id.in_(course_ids))
+    rows = (await db.execute(stmt)).all()
+    totals = await _load_course_totals(db, [row[0] for row in rows])
+    return [
+        build_course_progress(
+            course_id,
+            total_lessons=totals[course_id][0],
+            completed_lessons=completed or 0,
+            total_duration=totals[course_id][1],
+            watched_duration=watched or 0,
+        )
+        for course_id, watched, completed in rows
+    ]
+
+
+def summary_rebuild_select(dialect_name: str, user_ids: Sequence[int], course_ids: Optional[Sequence[int]] = None):
+    """Recompute user_course_progress rows for the given users (and courses) from raw progress."""
+    _, _, least = dialect_ops(dialect_name)
+    stmt = (
+        select(
+            Progress.user_id,
+            CourseModule.course_id,
+            func.sum(effective_watched_expr(least)),
+            func.sum(completed_expr(least)),
+            func.max(Progress.last_watched_at),
+        )
+        .join(CourseLesson, CourseLesson.id == Progress.lesson_id)
+        .join(CourseModule, CourseModule.id == CourseLesson.module_id)
+        .where(Progress.user_id.in_(user_ids))
+        .group_by(Progress.user_id, CourseModule.course_id)
+    )
+    if course_ids is not None:
+        stmt = stmt.where(CourseModule.course_id.in_(course_ids))
+    return stmt
+
+
+def rebuild_summary(
+    db: Session,
+    course_ids: Optional[Sequence[int]] = None,
+    batch_size: int = 500,
+    on_batch: Optional[Callable[[int, int], None]] = None,
+) -> Tuple[int, int]:
+    """
+    Recompute user_course_progress from raw progress (sync session): every
+    row, or only those of course_ids. Needed whenever lesson durations change,
+    since summary rows hold watched time capped at write time. One short
+    transaction per batch_size users, holding their write_progress locks.
+    Returns (users, summary rows); on_batch(users, rows) reports progress.
+    """
+    dialect_name = db.bind.dialect.name
+    if course_ids is None:
+        user_ids_query = select(User.id.label("user_id"))
+    else:
+        # Users with progress in those courses, or a summary row left from lessons moved away
+        user_ids_query = union(
+            select(Progress.user_id)
+            .join(CourseLesson, CourseLesson.id == Progress.lesson_id)
+            .join(CourseModule, CourseModule.id == CourseLesson.module_id)
+            .where(CourseModule.course_id.in_(course_ids)),
+            select(UserCourseProgress.user_id).where(UserCourseProgress.course_id.in_(course_ids)),
+        )
+    candidates = user_ids_query.subquery()
+    last_id = 0
+    users = rows = 0
+    while True:
+        # Keyset pagination over users
+        user_ids = db.scalars(
+            select(candidates.c.user_id).where(candidates.c.user_id > last_id)
+            .order_by(candidates.c.user_id).limit(batch_size)
+        ).all()
+        if not user_ids:
+            break
+        if dialect_name == "postgresql":
+            # A heartbeat committing between the DELETE and the INSERT would be counted twice
+            db.execute(summary_lock_stmt(user_ids))
+        stale = delete(UserCourseProgress).where(UserCourseProgress.user_id.in_(user_ids))
+        if course_ids is not None:
+            stale = stale.where(UserCourseProgress.course_id.in_(course_ids))
+        db.execute(stale)
+        result = db.execute(
+            insert(UserCourseProgress).from_select(
+                ["user_id", "course_id", "watched_duration", "completed_lessons", "last_activity_at"],
+                summary_rebuild_select(dialect_name, user_ids, course_ids),
+            )
+        )
+        db.commit()
+        users += len(user_ids)
+        rows += max(result.rowcount or 0, 0)
+        last_id = user_ids[-1]
+        if on_batch is not None:
+            on_batch(users, rows)
+    return users, rows
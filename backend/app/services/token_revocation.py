@@ -0,0 +1,71 @@
+"""
+In-memory revocation of access tokens by users.token_version.
+
+Every access token carries the user's token_version ("ver"). The version is
+bumped whenever the password changes or the user is deactivated (see the
+before_flush hook below), and the new minimum version is recorded here once
+the transaction commits, so get_current_user can reject older tokens
+without reading the users row. The map is loaded from the database on
+startup; a bump made by another worker process is only seen there after a
+restart, or once the token expires (ACCESS_TOKEN_EXPIRE_MINUTES).
+"""
+import logging
+from typing import Dict
+from sqlalchemy import event, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+_SESSION_KEY = "bumped_token_versions"
+
+# user_id -> lowest token_version still accepted
+_min_token_version: Dict[int, int] = {}
+
+
+def revoke_tokens_before(user_id: int, token_version: int) -> None:
+    if token_version > _min_token_version.get(user_id, 0):
+        _min_token_version[user_id] = token_version
+
+
+def is_token_revoked(user_id: int, token_version: int) -> bool:
+    return token_version < _min_token_version.get(user_id, 0)
+
+
+async def load_revocations(db: AsyncSession) -> int:
+    """Load every user whose tokens were ever revoked (token_version > 0)."""
+    result = await db.execute(select(User.id, User.token_version).where(User.token_version > 0))
+    for user_id, token_version in result:
+        revoke_tokens_before(user_id, token_version)
+    logger.info(f"Loaded {len(_min_token_version)} token revocation(s)")
+    return len(_min_token_version)
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_token_version(session, flush_context, instances):
+    for obj in session.dirty:
+        if not isinstance(obj, User):
+            continue
+        state = inspect(obj)
+        deactivated = any(not value for value in state.attrs.is_active.history.added)
+        if deactivated or state.attrs.hashed_password.history.added:
+            obj.token_version = (obj.token_version or 0) + 1
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_bumped_versions(session, flush_context):
+    for obj in session.dirty:
+        if isinstance(obj, User) and inspect(obj).attrs.token_version.history.added:
+            session.info.setdefault(_SESSION_KEY, {})[obj.id] = obj.token_version
+
+
+@event.listens_for(Session, "after_commit")
+def _revoke_on_commit(session):
+    for user_id, token_version in session.info.pop(_SESSION_KEY, {}).items():
+        revoke_tokens_before(user_id, token_version)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_on_rollback(session):
+    session.info.pop(_SESSION_KEY, None)
@@ -0,0 +1,20 @@
+"""
+Offline benchmarks for the backend.
+
+Run from backend/, e.g.: python -m benchmarks.auth
+
+Benchmarks never use DATABASE_URL: on a server it points at real data, and
+the seeded ones drop every table. They run against BENCHMARK_DATABASE_URL
+(default: sqlite:///./benchmark.db) instead.
+"""
+import os
+
+DEFAULT_BENCHMARK_DATABASE_URL = "sqlite:///./benchmark.db"
+
+# Always overwritten, never setdefault: an exported DATABASE_URL must not win.
+# Spawned servers (load --uvicorn) inherit it through the environment.
+os.environ["DATABASE_URL"] = os.environ.get("BENCHMARK_DATABASE_URL", DEFAULT_BENCHMARK_DATABASE_URL)
+# Let benchmarks import app.* without a .env (values only need to be valid)
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+# Not "development": per-request debug logging would dominate the timings
+os.environ.setdefault("ENVIRONMENT", "benchmark")
@@ -0,0 +1,68 @@
+"""
+Per-request authentication overhead: issuing tokens (create_access_token,
+create_user_access_token with and without profile claims), decode_access_token
+and the get_current_user dependency chain, with the decoded-token cache off
+and on.
+
+Run: python -m benchmarks.auth [--iterations 20000]
+"""
+import argparse
+import asyncio
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import benchmarks  # noqa: F401  (env defaults)
+from app.api.dependencies import get_current_user, get_token_payload
+from app.core.config import settings
+from app.core.security import (
+    create_access_token, create_user_access_token, decode_access_token, decoded_tokens,
+)
+from benchmarks.timing import per_call_us, per_call_us_async, print_results
+
+
+def _user():
+    return SimpleNamespace(
+        id=1, email="bench@example.com", username="bench", full_name="Bench User",
+        is_active=True, is_superuser=False, token_version=0,
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc),
+    )
+
+
+async def _auth_chain(token: str):
+    # What FastAPI runs per request with profile claims in the token (no DB)
+    payload = await get_token_payload(token)
+    return await get_current_user(payload, db=None)
+
+
+def run(iterations: int) -> dict:
+    user = _user()
+    results = {
+        "create_access_token_sub_only_us": per_call_us(lambda: create_access_token({"sub": "1"}), iterations),
+    }
+    for embed in (False, True):
+        settings.ACCESS_TOKEN_EMBED_PROFILE = embed
+        label = "with_profile" if embed else "sub_ver"
+        results[f"create_user_access_token_{label}_us"] = per_call_us(lambda: create_user_access_token(user), iterations)
+    token = create_user_access_token(user)
+    for enabled in (False, True):
+        settings.ACCESS_TOKEN_CACHE_ENABLED = enabled
+        decoded_tokens.clear()
+        label = "cached" if enabled else "uncached"
+        results[f"decode_access_token_{label}_us"] = per_call_us(lambda: decode_access_token(token), iterations)
+        results[f"get_current_user_{label}_us"] = asyncio.run(
+            per_call_us_async(lambda: _auth_chain(token), iterations)
+        )
+    results["decode_speedup"] = results["decode_access_token_uncached_us"] / results["decode_access_token_cached_us"]
+    results["cache"] = decoded_tokens.stats()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auth overhead per request")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    print_results(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Synthetic dataset for benchmarks: courses with modules, lessons and resources,
+users with progress rows, password reset tokens, and the user_course_progress
+summary built from that progress.
+
+Every user's password is DatasetSpec.password (hashed once), emails are
+user{n}@example.com.
+
+seed_dataset() drops every table first. Outside SQLite it refuses unless the
+database name contains "bench" or the caller passes allow_drop=True (the
+--i-know-this-drops-everything flag of benchmarks.load).
+"""
+import random
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from sqlalchemy import MetaData, insert, text
+from sqlalchemy.engine import Engine
+
+from app.core.database import Base
+from app.core.security import get_password_hash
+from app.models import (
+    Course, CourseLesson, CourseModule, CourseResource, PasswordResetToken, Progress, User, UserCourseProgress,
+)
+from app.services.progress_summary import summary_rebuild_select
+
+CHUNK = 5000
+# Word a database name must contain to be seeded without allow_drop
+BENCHMARK_DATABASE_MARKER = "bench"
+
+
+@dataclass
+class DatasetSpec:
+    courses: int = 50
+    modules_per_course: int = 6
+    lessons_per_module: int = 8
+    resources_per_course: int = 5
+    users: int = 2000
+    progress_per_user: int = 40
+    password: str = "benchmark"
+    seed: int = 1
+
+
+def user_email(n: int) -> str:
+    return f"user{n}@example.com"
+
+
+def _insert_chunks(conn, table, rows: List[Dict[str, Any]]) -> None:
+    for start in range(0, len(rows), CHUNK):
+        conn.execute(insert(table), rows[start:start + CHUNK])
+
+
+def check_disposable(engine: Engine, allow_drop: bool = False) -> None:
+    """Raise unless the database behind engine can be wiped."""
+    if allow_drop or engine.dialect.name == "sqlite":
+        return
+    database = engine.url.database or ""
+    if BENCHMARK_DATABASE_MARKER not in database.lower():
+        raise RuntimeError(
+            f"Refusing to drop every table of {engine.url.render_as_string(hide_password=True)}: "
+            f"the database name doesn't contain '{BENCHMARK_DATABASE_MARKER}'. Point BENCHMARK_DATABASE_URL "
+            "at a benchmark database or pass --i-know-this-drops-everything."
+        )
+
+
+def seed_dataset(engine: Engine, spec: DatasetSpec, allow_drop: bool = False) -> Dict[str, Any]:
+    """Drop every table in the database, recreate the app's tables and fill them according to spec."""
+    check_disposable(engine, allow_drop)
+    rnd = random.Random(spec.seed)
+    now = datetime.now(timezone.utc)
+    # Reflect first so tables only created by migrations (payments, ...) go too
+    existing = MetaData()
+    existing.reflect(engine)
+    existing.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    courses, modules, lessons, resources = [], [], [], []
+    for c in range(1, spec.courses + 1):
+        courses.append({
+            "id": c, "title": f"Course {c}", "description": "Benchmark course " * 20,
+            "short_description": f"Course {c}", "price": 0.0, "currency": "USD", "is_active": c % 10 != 0,
+        })
+        for r in range(spec.resources_per_course):
+            resources.append({
+                "course_id": c, "title": f"Resource {r}", "resource_type": "pdf",
+                "file_url": f"https://example.com/{c}/{r}.pdf", "order": r,
+            })
+        for m in range(spec.modules_per_course):
+            module_id = len(modules) + 1
+            modules.append({"id": module_id, "course_id": c, "title": f"Module {m}", "order": m})
+            for lesson in range(spec.lessons_per_module):
+                lessons.append({
+                    "id": len(lessons) + 1, "module_id": module_id, "title": f"Lesson {lesson}",
+                    "description": "Lesson description", "video_url": "https://youtu.be/dQw4w9WgXcQ",
+                    "video_duration": rnd.choice([None, rnd.randint(60, 1800)]) if lesson == 0 else rnd.randint(60, 1800),
+                    "order": lesson,
+                })
+
+    hashed = get_password_hash(spec.password)
+    users = [
+        {"id": u, "email": user_email(u), "username": f"user{u}", "hashed_password": hashed,
+         "full_name": f"User {u}", "auth_provider": "email", "is_active": True, "is_superuser": False}
+        for u in range(1, spec.users + 1)
+    ]
+    progress = []
+    per_user = min(spec.progress_per_user, len(lessons))
+    for u in range(1, spec.users + 1):
+        for lesson in rnd.sample(lessons, per_user):
+            watched = rnd.randint(0, (lesson["video_duration"] or 600) + 60)
+            progress.append({
+                "user_id": u, "lesson_id": lesson["id"], "watched_duration": watched,
+                "is_completed": bool(lesson["video_duration"]) and watched >= lesson["video_duration"] * 0.9,
+            })
+    tokens = [
+        {"user_id": u, "token": f"bench-token-{u}", "expires_at": now + timedelta(hours=1), "used": False}
+        for u in range(1, spec.users + 1, 10)
+    ]
+
+    with engine.begin() as conn:
+        _insert_chunks(conn, Course, courses)
+        _insert_chunks(conn, CourseModule, modules)
+        _insert_chunks(conn, CourseLesson, lessons)
+        _insert_chunks(conn, CourseResource, resources)
+        _insert_chunks(conn, User, users)
+        _insert_chunks(conn, Progress, progress)
+        _insert_chunks(conn, PasswordResetToken, tokens)
+        conn.execute(insert(UserCourseProgress).from_select(
+            ["user_id", "course_id", "watched_duration", "completed_lessons", "last_activity_at"],
+            summary_rebuild_select(engine.dialect.name, [u["id"] for u in users]),
+        ))
+        if engine.dialect.name == "postgresql":
+            # Explicit ids above don't advance the serial sequences
+            for table in ("courses", "course_modules", "course_lessons", "users"):
+                conn.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        # Fresh planner statistics for EXPLAIN and realistic plans
+        conn.execute(text("ANALYZE"))
+
+    return {
+        **asdict(spec),
+        "lessons": len(lessons),
+        "progress_rows": len(progress),
+        "dialect": engine.dialect.name,
+    }
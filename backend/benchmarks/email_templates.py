@@ -0,0 +1,71 @@
+"""
+Email template rendering: precompiled templates from the registry versus
+compiling the same source on every call, plus per-user announcement
+rendering throughput (the bulk-mailing case, CSS already inlined).
+
+Run: python -m benchmarks.email_templates [--iterations 2000]
+"""
+import argparse
+from collections import namedtuple
+
+import benchmarks  # noqa: F401  (env defaults)
+from app.core.email import get_password_reset_email_html, get_password_reset_email_text
+from app.core.email_templates import email_templates, inline_css
+from app.services.announcements import CampaignTemplates
+from benchmarks.timing import per_call_us, print_results
+
+RESET_URL = "https://example.com/auth/reset-password?token=" + "x" * 43
+
+ANNOUNCEMENT_HTML = """{% extends "base.html" %}
+{% block content %}
+        <h2>New courses, {{ name }}!</h2>
+        <p>Three new courses are out. You signed up as {{ username }} ({{ email }}).</p>
+        <a href="https://example.com/courses" class="button">See the courses</a>
+{% endblock %}
+"""
+ANNOUNCEMENT_TEXT = """{% extends "base.txt" %}
+{% block content %}
+New courses, {{ name }}!
+
+Three new courses are out: https://example.com/courses
+{% endblock %}
+"""
+
+Recipient = namedtuple("Recipient", "id email username full_name")
+
+
+def run(iterations: int = 2000) -> dict:
+    email_templates.load()
+    source = (email_templates.directory / "password_reset.html").read_text(encoding="utf-8")
+    env = email_templates.env
+
+    def compile_and_render():
+        env.from_string(inline_css(source, email_templates.rules)).render(reset_url=RESET_URL)
+
+    templates = CampaignTemplates("News for {{ name }}", ANNOUNCEMENT_HTML, ANNOUNCEMENT_TEXT)
+    recipients = [Recipient(i, f"user{i}@example.com", f"user{i}", f"User {i}" if i % 2 else None) for i in range(iterations)]
+    position = iter(range(10 ** 9))
+
+    def render_announcement():
+        templates.render(recipients[next(position) % iterations])
+
+    announcement_us = per_call_us(render_announcement, iterations)
+    return {
+        "password_reset_html_us": per_call_us(lambda: get_password_reset_email_html(RESET_URL), iterations),
+        "password_reset_text_us": per_call_us(lambda: get_password_reset_email_text(RESET_URL), iterations),
+        "password_reset_html_compile_per_call_us": per_call_us(compile_and_render, max(iterations // 20, 10)),
+        "announcement_render_us": announcement_us,
+        "announcement_renders_per_sec": 1e6 / announcement_us,
+        "announcement_100k_users_s": announcement_us * 100_000 / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Email template render throughput")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+    print_results(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
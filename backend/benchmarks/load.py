@@ -0,0 +1,403 @@
+"""
+End-to-end load test of the hot API paths.
+
+Seeds the synthetic dataset (benchmarks.dataset), logs in a pool of virtual
+users and runs each scenario for a fixed time with N concurrent clients:
+
+    login            POST /auth/login (bcrypt)
+    course_list      GET  /courses/
+    course_detail    GET  /courses/{id}
+    progress_update  POST /progress/update, player heartbeats: each user keeps
+                     watching one lesson and moves on to another now and then
+    course_progress  GET  /account/progress/{id}
+
+Throughput, error counts and latency percentiles per scenario are written as
+JSON. --compare flags scenarios whose throughput dropped or p95 latency rose
+by more than --threshold against a stored baseline (exit status 1).
+
+Targets:
+    (default)        the app in-process over ASGI (lifespan included): no HTTP
+                     parsing or sockets, client and server share one event loop
+    --uvicorn        spawn `uvicorn app.main:app` (--workers N) on a free port
+    --url URL        an already running server on the same database
+
+Run from backend/:
+    python -m benchmarks.load --output baseline.json
+    python -m benchmarks.load --compare baseline.json
+    python -m benchmarks.load --input current.json --compare baseline.json
+The database (BENCHMARK_DATABASE_URL, see benchmarks/__init__.py) is dropped
+and re-created unless --no-seed; outside SQLite its name must contain "bench"
+or --i-know-this-drops-everything must be passed.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+import benchmarks  # noqa: F401  (env defaults)
+import httpx
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models import Course, CourseLesson, CourseModule, User
+from benchmarks.dataset import DatasetSpec, seed_dataset
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+PERCENTILES = (50, 90, 95, 99)
+# Chance that a heartbeat comes from a newly opened lesson
+LESSON_SWITCH_PROBABILITY = 0.05
+# Settings that change what a request costs; recorded so results stay comparable
+RECORDED_SETTINGS = (
+    "COURSE_CACHE_ENABLED", "PRINCIPAL_CACHE_ENABLED", "ACCESS_TOKEN_CACHE_ENABLED",
+    "ACCESS_TOKEN_EMBED_PROFILE", "PROGRESS_WRITE_BEHIND", "PROGRESS_SUMMARY_ENABLED",
+    "DB_POOL_SIZE", "DB_MAX_OVERFLOW", "PASSWORD_HASH_EXECUTOR", "PASSWORD_HASH_WORKERS",
+)
+
+
+@dataclass
+class Catalog:
+    course_ids: List[int]
+    lesson_ids: Dict[int, List[int]]  # active course -> its lesson ids
+    emails: List[str]
+    password: str
+
+
+@dataclass
+class VirtualUser:
+    email: str
+    headers: Dict[str, str]
+    lesson_id: Optional[int] = None
+    # lesson_id -> seconds watched so far, so heartbeats only move forward
+    watched: Dict[int, int] = field(default_factory=dict)
+
+
+Scenario = Callable[[httpx.AsyncClient, VirtualUser, Catalog, random.Random], Awaitable[httpx.Response]]
+
+
+async def login(client, user, catalog, rnd):
+    return await client.post("/api/v1/auth/login", json={"email": user.email, "password": catalog.password})
+
+
+async def course_list(client, user, catalog, rnd):
+    return await client.get("/api/v1/courses/")
+
+
+async def course_detail(client, user, catalog, rnd):
+    return await client.get(f"/api/v1/courses/{rnd.choice(catalog.course_ids)}", headers=user.headers)
+
+
+async def progress_update(client, user, catalog, rnd):
+    if user.lesson_id is None or rnd.random() < LESSON_SWITCH_PROBABILITY:
+        user.lesson_id = rnd.choice(catalog.lesson_ids[rnd.choice(catalog.course_ids)])
+    watched = user.watched[user.lesson_id] = user.watched.get(user.lesson_id, 0) + rnd.randint(5, 15)
+    return await client.post(
+        "/api/v1/progress/update", headers=user.headers,
+        json={"lesson_id": user.lesson_id, "watched_duration": watched},
+    )
+
+
+async def course_progress(client, user, catalog, rnd):
+    return await client.get(f"/api/v1/account/progress/{rnd.choice(catalog.course_ids)}", headers=user.headers)
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": login,
+    "course_list": course_list,
+    "course_detail": course_detail,
+    "progress_update": progress_update,
+    "course_progress": course_progress,
+}
+
+
+def dataset_size() -> Dict[str, int]:
+    with engine.connect() as conn:
+        return {
+            name: conn.scalar(select(func.count()).select_from(model))
+            for name, model in (("users", User), ("courses", Course), ("lessons", CourseLesson))
+        }
+
+
+def load_catalog(password: str, max_users: int) -> Catalog:
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(CourseModule.course_id, CourseLesson.id)
+            .join(CourseLesson, CourseLesson.module_id == CourseModule.id)
+            .join(Course, Course.id == CourseModule.course_id)
+            .where(Course.is_active == True)
+            .order_by(CourseModule.course_id, CourseLesson.id)
+        ).all()
+        emails = conn.execute(
+            select(User.email).where(User.email.like("user%@example.com")).order_by(User.id).limit(max_users)
+        ).scalars().all()
+    lesson_ids: Dict[int, List[int]] = {}
+    for course_id, lesson_id in rows:
+        lesson_ids.setdefault(course_id, []).append(lesson_id)
+    if not lesson_ids or not emails:
+        raise SystemExit("No benchmark data in the database; run without --no-seed first")
+    return Catalog(course_ids=sorted(lesson_ids), lesson_ids=lesson_ids, emails=list(emails), password=password)
+
+
+async def login_users(client: httpx.AsyncClient, catalog: Catalog) -> List[VirtualUser]:
+    # A few at a time: the bcrypt pool rejects bursts beyond its queue limit
+    semaphore = asyncio.Semaphore(4)
+
+    async def one(email: str) -> VirtualUser:
+        async with semaphore:
+            response = await client.post("/api/v1/auth/login", json={"email": email, "password": catalog.password})
+        response.raise_for_status()
+        return VirtualUser(email=email, headers={"Authorization": f"Bearer {response.json()['access_token']}"})
+
+    return await asyncio.gather(*(one(email) for email in catalog.emails))
+
+
+def _percentile(ordered: List[float], percent: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: List[float], errors: int, statuses: Dict[str, int], duration: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    requests = len(ordered)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "statuses": dict(sorted(statuses.items())),
+        "rps": requests / duration if duration else 0.0,
+        "latency_ms": {
+            "mean": sum(ordered) / requests * 1000 if requests else 0.0,
+            **{f"p{p}": _percentile(ordered, p) * 1000 for p in PERCENTILES},
+            "max": ordered[-1] * 1000 if ordered else 0.0,
+        },
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient, scenario: Scenario, users: List[VirtualUser], catalog: Catalog,
+    concurrency: int, duration: float, warmup: float,
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    measure_from = time.perf_counter() + warmup
+    stop_at = measure_from + duration
+
+    async def worker(index: int) -> None:
+        nonlocal errors
+        rnd = random.Random(index)
+        user = users[index % len(users)]
+        while True:
+            started = time.perf_counter()
+            if started >= stop_at:
+                return
+            try:
+                response = await scenario(client, user, catalog, rnd)
+                status = str(response.status_code)
+                failed = response.status_code >= 400
+            except httpx.HTTPError as exc:
+                status, failed = type(exc).__name__, True
+            if started < measure_from:
+                continue
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            errors += failed
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return summarize(latencies, errors, statuses, duration)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def open_client(args) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=30) as client:
+            yield client
+    elif args.uvicorn:
+        port = _free_port()
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(args.workers), "--log-level", "warning", "--no-access-log"],
+            env=os.environ.copy(),
+        )
+        try:
+            async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30) as client:
+                for _ in range(300):
+                    if server.poll() is not None:
+                        raise SystemExit(f"uvicorn exited with status {server.returncode}")
+                    try:
+                        if (await client.get("/health")).status_code == 200:
+                            break
+                    except httpx.TransportError:
+                        pass
+                    await asyncio.sleep(0.1)
+                else:
+                    raise SystemExit("uvicorn did not become healthy within 30s")
+                yield client
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    else:
+        from app.main import app
+        # httpx's ASGI transport doesn't send lifespan events; run startup/shutdown ourselves
+        async with app.router.lifespan_context(app):
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app), base_url="http://bench", limits=limits, timeout=30,
+            ) as client:
+                yield client
+
+
+async def run(args, catalog: Catalog) -> Dict[str, Dict[str, Any]]:
+    results = {}
+    async with open_client(args) as client:
+        users = await login_users(client, catalog)
+        for name in args.scenarios:
+            results[name] = await run_scenario(
+                client, SCENARIOS[name], users, catalog, args.concurrency, args.duration, args.warmup,
+            )
+            print(format_row(name, results[name]), flush=True)
+    return results
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def format_row(name: str, result: Dict[str, Any]) -> str:
+    latency = result["latency_ms"]
+    return (
+        f"{name:16} {result['rps']:9.1f} req/s  p50 {latency['p50']:8.2f}  p95 {latency['p95']:8.2f}  "
+        f"p99 {latency['p99']:8.2f} ms  errors {result['errors']}/{result['requests']}"
+    )
+
+
+def _change(current: float, baseline: float) -> float:
+    return (current - baseline) / baseline if baseline else 0.0
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Print current vs baseline per scenario and return the regressions found."""
+    for key in ("target", "concurrency", "duration", "dataset", "settings"):
+        if current["meta"].get(key) != baseline["meta"].get(key):
+            print(f"warning: {key} differs from the baseline: {baseline['meta'].get(key)} -> {current['meta'].get(key)}")
+    regressions = []
+    print(f"{'scenario':16} {'req/s':>21} {'change':>8}  {'p95 ms':>19} {'change':>8}")
+    for name, result in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if base is None:
+            print(f"{name:16} (not in baseline)")
+            continue
+        rps_change = _change(result["rps"], base["rps"])
+        p95_change = _change(result["latency_ms"]["p95"], base["latency_ms"]["p95"])
+        problems = []
+        if rps_change < -threshold:
+            problems.append(f"throughput {rps_change:+.0%}")
+        if p95_change > threshold:
+            problems.append(f"p95 {p95_change:+.0%}")
+        if result["errors"] > base["errors"]:
+            problems.append(f"errors {base['errors']} -> {result['errors']}")
+        print(
+            f"{name:16} {base['rps']:9.1f} -> {result['rps']:9.1f} {rps_change:+8.1%}  "
+            f"{base['latency_ms']['p95']:8.2f} -> {result['latency_ms']['p95']:8.2f} {p95_change:+8.1%}"
+            + ("  REGRESSION" if problems else "")
+        )
+        regressions.extend(f"{name}: {problem}" for problem in problems)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the hot API paths against a seeded database")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated, default: all")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients per scenario")
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--virtual-users", type=int, default=64, help="distinct logged-in users")
+    parser.add_argument("--users", type=int, default=2000, help="users in the seeded dataset")
+    parser.add_argument("--courses", type=int, default=50)
+    parser.add_argument("--no-seed", action="store_true", help="reuse the data already in the database")
+    parser.add_argument("--i-know-this-drops-everything", dest="allow_drop", action="store_true",
+                        help="seed a non-SQLite database whose name doesn't contain 'bench'")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--uvicorn", action="store_true", help="spawn a local uvicorn server")
+    target.add_argument("--url", help="base URL of a running server")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers with --uvicorn")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/load-<time>.json)")
+    parser.add_argument("--input", help="compare an existing results file instead of running")
+    parser.add_argument("--compare", metavar="BASELINE", help="results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    args = parser.parse_args(argv)
+    # One INFO line per client request would swamp the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if args.input:
+        with open(args.input) as f:
+            current = json.load(f)
+    else:
+        args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+        unknown = set(args.scenarios) - set(SCENARIOS)
+        if unknown:
+            parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+        spec = DatasetSpec(users=args.users, courses=args.courses)
+        if not args.no_seed:
+            seed_dataset(engine, spec, allow_drop=args.allow_drop)
+        catalog = load_catalog(spec.password, args.virtual_users)
+        current = {
+            "meta": {
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "git_revision": _git_revision(),
+                "python": platform.python_version(),
+                "target": args.url or (f"uvicorn x{args.workers}" if args.uvicorn else "asgi"),
+                "database": engine.dialect.name,
+                "dataset": dataset_size(),
+                "concurrency": args.concurrency,
+                "duration": args.duration,
+                "virtual_users": len(catalog.emails),
+                "settings": {name: getattr(settings, name) for name in RECORDED_SETTINGS},
+            },
+            "scenarios": asyncio.run(run(args, catalog)),
+        }
+        output = args.output or os.path.join(
+            RESULTS_DIR, f"load-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"results written to {output}")
+
+    if not args.compare:
+        return 0
+    with open(args.compare) as f:
+        baseline = json.load(f)
+    regressions = compare(current, baseline, args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+All micro-benchmarks in one run (auth tokens, bcrypt costs, course
+serialization, progress math, email templates), optionally written as JSON.
+
+Run: python -m benchmarks.micro [--quick] [--output micro.json]
+"""
+import argparse
+import json
+import platform
+from datetime import datetime, timezone
+
+import benchmarks  # noqa: F401  (env defaults)
+from benchmarks import auth, email_templates, passwords, progress_math, serialization
+from benchmarks.timing import print_results
+
+
+def run(quick: bool = False) -> dict:
+    scale = 10 if quick else 1
+    return {
+        "auth": auth.run(iterations=20000 // scale),
+        "passwords": passwords.run(rounds=(10, 12) if quick else (10, 11, 12, 13), iterations=2 if quick else 5),
+        "serialization": serialization.run(iterations=200 // scale),
+        "progress_math": progress_math.run(iterations=20000 // scale),
+        "email_templates": email_templates.run(iterations=2000 // scale),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every micro-benchmark")
+    parser.add_argument("--quick", action="store_true", help="fewer iterations and bcrypt costs")
+    parser.add_argument("--output", help="write results as JSON")
+    args = parser.parse_args()
+    results = run(args.quick)
+    for group, values in results.items():
+        print(f"[{group}]")
+        print_results(values)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {"started_at": datetime.now(timezone.utc).isoformat(), "python": platform.python_version()},
+                **results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
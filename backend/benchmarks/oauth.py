@@ -0,0 +1,214 @@
+"""
+Google OAuth login latency (POST /api/v1/auth/google/callback) against a
+local HTTPS stand-in for Google's token and userinfo endpoints: a fresh
+httpx client per login, as the endpoint used to work, versus the shared
+pooled client.
+
+Loopback has next to no latency, so --rtt-ms puts a proxy in front of the
+stand-in that delays every chunk by half the round trip each way (plus one
+round trip on connect for the TCP handshake). Google's endpoints speak
+HTTP/2, the stand-in (uvicorn) only HTTP/1.1.
+
+Run: python -m benchmarks.oauth [--logins 100] [--rtt-ms 0,20,80]
+"""
+import argparse
+import asyncio
+import datetime
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import List
+from unittest import mock
+
+# Logins create users; keep them out of the load-test dataset
+os.environ.setdefault("BENCHMARK_DATABASE_URL", "sqlite:///./benchmark_oauth.db")
+os.environ.setdefault("GOOGLE_CLIENT_ID", "benchmark-client")
+os.environ.setdefault("GOOGLE_CLIENT_SECRET", "benchmark-secret")
+
+import benchmarks  # noqa: F401  (env defaults)
+import httpx
+import uvicorn
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.api.v1 import auth
+from app.core.config import settings
+from app.core.database import Base, engine
+from app.core.http_client import close_http_client, create_http_client
+from benchmarks.timing import print_results
+
+USERS = 50
+
+
+async def _token(request):
+    form = await request.form()
+    return JSONResponse({"access_token": f"token-{form['code']}", "token_type": "Bearer", "expires_in": 3599})
+
+
+async def _userinfo(request):
+    n = int(request.headers["authorization"].rsplit("-", 1)[1]) % USERS
+    return JSONResponse({"id": f"google-{n}", "email": f"google{n}@example.com", "name": f"Google User {n}"})
+
+
+google_stub = Starlette(routes=[Route("/token", _token, methods=["POST"]), Route("/userinfo", _userinfo)])
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _self_signed_cert(directory: str):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1)).not_valid_after(now + datetime.timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName("localhost")]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+        ))
+    return cert_path, key_path
+
+
+def start_google_stub(directory: str) -> int:
+    cert_path, key_path = _self_signed_cert(directory)
+    # httpx trusts SSL_CERT_FILE (trust_env); set before any client is created
+    os.environ["SSL_CERT_FILE"] = cert_path
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(
+        google_stub, host="127.0.0.1", port=port, ssl_certfile=cert_path, ssl_keyfile=key_path, log_level="warning",
+    ))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return port
+
+
+@asynccontextmanager
+async def latency_proxy(upstream_port: int, rtt_ms: float):
+    """Forward to upstream with rtt/2 one-way delay per chunk, plus one rtt per new connection."""
+    delay = rtt_ms / 2000
+    connections = set()
+
+    async def pipe(reader, writer):
+        # Chunks are delivered `delay` after they arrived, in order, without adding up
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def deliver():
+            while (item := await queue.get()) is not None:
+                due, data = item
+                await asyncio.sleep(due - time.monotonic())
+                writer.write(data)
+                await writer.drain()
+
+        delivery = asyncio.create_task(deliver())
+        try:
+            while data := await reader.read(65536):
+                queue.put_nowait((time.monotonic() + delay, data))
+            queue.put_nowait(None)
+            await delivery
+        except ConnectionError:
+            pass
+        finally:
+            delivery.cancel()
+            writer.close()
+
+    async def handle(client_reader, client_writer):
+        connections.add(asyncio.current_task())
+        try:
+            await asyncio.sleep(2 * delay)  # TCP handshake
+            upstream_reader, upstream_writer = await asyncio.open_connection("127.0.0.1", upstream_port)
+            await asyncio.gather(pipe(client_reader, upstream_writer), pipe(upstream_reader, client_writer))
+        except asyncio.CancelledError:
+            client_writer.close()
+        finally:
+            connections.discard(asyncio.current_task())
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    try:
+        yield server.sockets[0].getsockname()[1]
+    finally:
+        server.close()
+        for task in list(connections):
+            task.cancel()
+        await asyncio.gather(*connections, return_exceptions=True)
+
+
+async def _logins(api: httpx.AsyncClient, logins: int) -> List[float]:
+    latencies = []
+    for i in range(logins):
+        started_at = time.perf_counter()
+        response = await api.post("/api/v1/auth/google/callback", json={"code": str(i)})
+        latencies.append((time.perf_counter() - started_at) * 1000)
+        assert response.status_code == 200, response.text
+    return latencies
+
+
+async def _measure(stub_port: int, rtt_ms: float, logins: int) -> dict:
+    from app.main import app
+    results = {}
+    async with latency_proxy(stub_port, rtt_ms) as port:
+        settings.GOOGLE_TOKEN_URL = f"https://localhost:{port}/token"
+        settings.GOOGLE_USERINFO_URL = f"https://localhost:{port}/userinfo"
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as api:
+            await _logins(api, USERS)  # create the users and warm up
+
+            fresh_clients = []
+
+            def fresh_client():
+                fresh_clients.append(create_http_client())
+                return fresh_clients[-1]
+
+            with mock.patch.object(auth, "get_http_client", fresh_client):
+                fresh = await _logins(api, logins)
+            for client in fresh_clients:
+                await client.aclose()
+            shared = await _logins(api, logins)
+    await close_http_client()
+    for name, latencies in (("fresh_client", fresh), ("shared_client", shared)):
+        results[f"rtt{rtt_ms:g}ms_{name}_mean_ms"] = statistics.mean(latencies)
+        results[f"rtt{rtt_ms:g}ms_{name}_p95_ms"] = statistics.quantiles(latencies, n=20)[-1]
+    return results
+
+
+def run(logins: int = 100, rtts=(0.0, 20.0)) -> dict:
+    Base.metadata.create_all(engine)
+    with tempfile.TemporaryDirectory() as directory:
+        stub_port = start_google_stub(directory)
+        results = {}
+        for rtt_ms in rtts:
+            results.update(asyncio.run(_measure(stub_port, rtt_ms, logins)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Google OAuth login latency: fresh vs shared HTTP client")
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--rtt-ms", default="0,20", help="comma-separated simulated round-trip times to Google")
+    args = parser.parse_args()
+    print_results(run(args.logins, tuple(float(rtt) for rtt in args.rtt_ms.split(","))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""
+bcrypt cost per work factor: get_password_hash / verify_password as the app
+runs them (one call per register / login / reset), at several costs.
+
+Each step up doubles the work; logins_per_sec_per_worker is what one
+PASSWORD_HASH_WORKERS process can sustain at that cost.
+
+Run: python -m benchmarks.passwords [--rounds 10,11,12,13] [--iterations 5]
+"""
+import argparse
+from unittest import mock
+
+import benchmarks  # noqa: F401  (env defaults)
+import bcrypt
+from app.core.security import get_password_hash, verify_password
+from benchmarks.timing import per_call_us, print_results
+
+PASSWORD = "correct horse battery staple"
+
+
+def run(rounds=(10, 11, 12, 13), iterations: int = 5) -> dict:
+    results = {"default_rounds": int(get_password_hash(PASSWORD).split("$")[2])}
+    gensalt = bcrypt.gensalt
+    for cost in rounds:
+        # get_password_hash calls bcrypt.gensalt() with the library default
+        with mock.patch.object(bcrypt, "gensalt", lambda: gensalt(cost)):
+            hashed = get_password_hash(PASSWORD)
+            results[f"get_password_hash_r{cost}_ms"] = per_call_us(lambda: get_password_hash(PASSWORD), iterations, repeat=1) / 1000
+        verify_ms = per_call_us(lambda: verify_password(PASSWORD, hashed), iterations, repeat=1) / 1000
+        results[f"verify_password_r{cost}_ms"] = verify_ms
+        results[f"logins_per_sec_per_worker_r{cost}"] = 1000 / verify_ms
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="bcrypt hash/verify time per cost factor")
+    parser.add_argument("--rounds", default="10,11,12,13", help="comma-separated bcrypt costs")
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+    print_results(run(tuple(int(cost) for cost in args.rounds.split(",")), args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Python-side cost of course progress, without a database:
+
+- build_course_progress: one CourseProgressResponse (every progress read);
+- summary_deltas: user_course_progress increments for a heartbeat (1 row)
+  and a buffer flush / batch (many rows);
+- course_progress_stmt: building the aggregate query used when
+  PROGRESS_SUMMARY_ENABLED is off, plus its cache key (paid per execution)
+  and a full compile (paid once per process by SQLAlchemy's statement cache).
+
+Run: python -m benchmarks.progress_math [--iterations 20000]
+"""
+import argparse
+import random
+from datetime import datetime, timezone
+
+import benchmarks  # noqa: F401  (env defaults)
+from sqlalchemy.dialects import postgresql
+from app.models.course import Course
+from app.services.progress import build_course_progress, course_progress_stmt
+from app.services.progress_summary import LessonInfo, summary_deltas
+from benchmarks.timing import per_call_us, print_results
+
+BATCH_SIZES = (1, 50, 500)
+
+
+def _batch(size: int, rnd: random.Random):
+    now = datetime.now(timezone.utc)
+    lessons = {
+        lesson_id: LessonInfo(course_id=lesson_id % 10 + 1, video_duration=rnd.choice([None, 600, 1200]))
+        for lesson_id in range(1, size + 1)
+    }
+    progress = [
+        {"user_id": 1, "lesson_id": lesson_id, "watched_duration": rnd.randint(0, 1500), "last_watched_at": now}
+        for lesson_id in lessons
+    ]
+    old_watched = {(1, lesson_id): rnd.randint(0, 600) for lesson_id in lessons if lesson_id % 2}
+    return progress, old_watched, lessons
+
+
+def run(iterations: int = 20000) -> dict:
+    rnd = random.Random(1)
+    results = {
+        "build_course_progress_us": per_call_us(
+            lambda: build_course_progress(1, total_lessons=48, completed_lessons=17, total_duration=28800, watched_duration=10321),
+            iterations,
+        ),
+    }
+    for size in BATCH_SIZES:
+        progress, old_watched, lessons = _batch(size, rnd)
+        results[f"summary_deltas_{size}_rows_us"] = per_call_us(
+            lambda: summary_deltas(progress, old_watched, lessons), max(1, iterations // size)
+        )
+
+    def build():
+        return course_progress_stmt("postgresql", 1).where(Course.id == 1)
+
+    stmt = build()
+    dialect = postgresql.dialect()
+    results["course_progress_stmt_build_us"] = per_call_us(build, iterations // 10)
+    # Cache keys are memoized per statement object, so time it on fresh ones
+    results["course_progress_stmt_build_and_cache_key_us"] = per_call_us(
+        lambda: build()._generate_cache_key(), iterations // 10
+    )
+    results["course_progress_stmt_compile_us"] = per_call_us(lambda: stmt.compile(dialect=dialect), iterations // 100)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Progress aggregation cost in Python")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    print_results(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
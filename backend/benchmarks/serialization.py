@@ -0,0 +1,63 @@
+"""
+Cost of rendering GET /courses/{id} on a cache miss: CourseDetailResponse
+validation from the ORM tree (from_attributes) and JSON dumping, for course
+trees of growing size. Objects are built in memory, no database.
+
+Run: python -m benchmarks.serialization [--iterations 200]
+"""
+import argparse
+from datetime import datetime, timezone
+
+import benchmarks  # noqa: F401  (env defaults)
+from app.models import Course, CourseLesson, CourseModule
+from app.schemas.course import CourseDetailResponse
+from benchmarks.timing import per_call_us, print_results
+
+# (modules, lessons per module)
+TREE_SIZES = ((6, 8), (20, 20), (50, 40))
+
+
+def build_course(modules: int, lessons_per_module: int) -> Course:
+    created_at = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    course = Course(
+        id=1, title="Benchmark course", description="Benchmark course " * 20, short_description="Course",
+        price=0.0, currency="USD", image_url=None, is_active=True, created_at=created_at,
+    )
+    lesson_id = 0
+    for m in range(modules):
+        module = CourseModule(id=m + 1, course_id=1, title=f"Module {m}", description="Module description", order=m)
+        for n in range(lessons_per_module):
+            lesson_id += 1
+            module.lessons.append(CourseLesson(
+                id=lesson_id, module_id=module.id, title=f"Lesson {n}", description="Lesson description",
+                video_url="https://youtu.be/dQw4w9WgXcQ", video_duration=600, order=n,
+            ))
+        course.modules.append(module)
+    return course
+
+
+def run(iterations: int = 200) -> dict:
+    results = {}
+    for modules, lessons in TREE_SIZES:
+        course = build_course(modules, lessons)
+        label = f"{modules}x{lessons}"
+        response = CourseDetailResponse.model_validate(course)
+        validate_us = per_call_us(lambda: CourseDetailResponse.model_validate(course), iterations)
+        dump_us = per_call_us(lambda: response.model_dump_json(), iterations)
+        results[f"{label}_model_validate_us"] = validate_us
+        results[f"{label}_model_dump_json_us"] = dump_us
+        results[f"{label}_total_us"] = validate_us + dump_us
+        results[f"{label}_per_lesson_us"] = (validate_us + dump_us) / (modules * lessons)
+        results[f"{label}_bytes"] = len(response.model_dump_json())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="CourseDetailResponse serialization cost")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+    print_results(run(args.iterations))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+SMTP throughput against a local stand-in server (aiosmtpd): a fresh
+connection + AUTH per message, as email sending used to work, versus
+SMTPPool reusing authenticated connections.
+
+The stand-in answers instantly and without TLS, so the gap here is the
+floor; against a real provider every avoided connection also saves a TLS
+handshake and a network round trip or three.
+
+Requires aiosmtpd (not an app dependency): pip install aiosmtpd
+
+Run: python -m benchmarks.smtp [--messages 500] [--concurrency 4] [--pool-size 3]
+"""
+import argparse
+import asyncio
+import logging
+import socket
+import time
+
+import benchmarks  # noqa: F401  (env defaults)
+from app.core.config import settings
+from app.core.email import build_message
+from app.core.smtp_pool import SMTPPool
+from benchmarks.timing import print_results
+
+try:
+    from aiosmtpd.controller import Controller
+    from aiosmtpd.smtp import AuthResult
+except ImportError:  # pragma: no cover
+    Controller = None
+
+
+class _CountingHandler:
+    def __init__(self):
+        self.messages = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        return "250 Message accepted for delivery"
+
+
+def _accept_any(server, session, envelope, mechanism, auth_data):
+    return AuthResult(success=True)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _send_all(pool: SMTPPool, messages: int, concurrency: int) -> float:
+    message = build_message("student@example.com", "Benchmark", "<p>Hello</p>", "Hello")
+    queue = iter(range(messages))
+
+    async def sender():
+        for _ in queue:
+            await pool.send_message(message)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(sender() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+    await pool.close()
+    return elapsed
+
+
+def run(messages: int = 500, concurrency: int = 4, pool_size: int = 3) -> dict:
+    if Controller is None:
+        raise SystemExit("aiosmtpd is required: pip install aiosmtpd")
+    # aiosmtpd logs a warning about its own deprecated Session.login_data on every AUTH
+    logging.getLogger("mail.log").setLevel(logging.ERROR)
+    handler = _CountingHandler()
+    port = _free_port()
+    controller = Controller(
+        handler, hostname="127.0.0.1", port=port, authenticator=_accept_any, auth_require_tls=False,
+    )
+    controller.start()
+    settings.SMTP_HOST, settings.SMTP_PORT = "127.0.0.1", port
+    settings.SMTP_USER, settings.SMTP_PASSWORD = "bench", "bench"
+    settings.SMTP_FROM_EMAIL = "noreply@example.com"
+    results = {}
+    try:
+        for name, per_connection in (("fresh_connection", 1), ("pooled", settings.SMTP_POOL_MAX_MESSAGES_PER_CONNECTION)):
+            pool = SMTPPool(
+                max_size=pool_size,
+                max_messages_per_connection=per_connection,
+                keepalive_interval=settings.SMTP_POOL_KEEPALIVE_SECONDS,
+                max_idle=settings.SMTP_POOL_MAX_IDLE_SECONDS,
+            )
+            elapsed = asyncio.run(_send_all(pool, messages, concurrency))
+            results[f"{name}_messages_per_sec"] = messages / elapsed
+            results[f"{name}_ms_per_message"] = elapsed / messages * 1000
+            results[f"{name}_connections_opened"] = pool.connections_opened
+    finally:
+        controller.stop()
+    results["server_messages_received"] = handler.messages
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SMTP messages/second: fresh connection per message vs pooled")
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4, help="concurrent senders (outbox worker concurrency)")
+    parser.add_argument("--pool-size", type=int, default=settings.SMTP_POOL_SIZE)
+    args = parser.parse_args()
+    print_results(run(args.messages, args.concurrency, args.pool_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+"""Timing helpers shared by the micro-benchmarks."""
+import time
+from typing import Awaitable, Callable
+
+
+def per_call_us(fn: Callable[[], object], iterations: int, repeat: int = 3) -> float:
+    """Best-of-`repeat` mean time of fn() in microseconds (best = least disturbed run)."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            fn()
+        best = min(best, (time.perf_counter() - start) / iterations * 1e6)
+    return best
+
+
+async def per_call_us_async(fn: Callable[[], Awaitable[object]], iterations: int, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await fn()
+        best = min(best, (time.perf_counter() - start) / iterations * 1e6)
+    return best
+
+
+def print_results(results: dict) -> None:
+    for name, value in results.items():
+        print(f"{name:48} {value:.2f}" if isinstance(value, float) else f"{name:48} {value}")
@@ -0,0 +1,60 @@
+"""
+Deliver queued emails (email_outbox) outside of the web process.
+
+Run alongside the API with EMAIL_OUTBOX_WORKER_ENABLED=false there, or use
+--once from cron. Any number of workers may run at once; rows are claimed
+with SKIP LOCKED.
+
+Run: python scripts/email_worker.py [--once]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.smtp_pool import smtp_pool
+from app.services.email_outbox import email_outbox
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+async def run(once: bool) -> None:
+    try:
+        await _run(once)
+    finally:
+        await smtp_pool.close()
+
+
+async def _run(once: bool) -> None:
+    if once:
+        delivered = 0
+        while True:
+            claimed = await email_outbox.deliver_due()
+            delivered += claimed
+            if claimed < email_outbox.batch_size:
+                break
+        print(f"Processed {delivered} email(s)")
+        return
+    email_outbox.start()
+    try:
+        # Runs until interrupted
+        await asyncio.Event().wait()
+    finally:
+        await email_outbox.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--once", action="store_true", help="Deliver everything due, then exit")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args.once))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -14,6 +14,7 @@ from sqlalchemy.orm import Session
 from app.core.database import SessionLocal, engine, Base
 from app.models import User, Course, CourseModule, CourseLesson, CourseResource
 from app.core.security import get_password_hash
+from app.services.progress_summary import rebuild_summary
 
 # Create tables
 Base.metadata.create_all(bind=engine)
@@ -58,6 +59,8 @@ def init_test_data():
     }
     
     test_course = None
+    # Courses whose lesson durations changed: their progress summary must be rebuilt
+    retimed_course_ids = set()
     
     for course in all_courses:
         # Check if course needs translation
@@ -163,6 +166,8 @@ def init_test_data():
                 existing_lesson.title = lesson_data["title"]
                 existing_lesson.description = lesson_data["description"]
                 existing_lesson.video_url = lesson_data["video_url"]
+                if existing_lesson.video_duration != lesson_data["video_duration"]:
+                    retimed_course_ids.add(test_course.id)
                 existing_lesson.video_duration = lesson_data["video_duration"]
             else:
                 # Create new lesson
@@ -232,6 +237,11 @@ def init_test_data():
 
     db.commit()
     print("✓ Updated all courses to English")
+
+    if retimed_course_ids:
+        # Summary rows hold watched time capped by the old durations
+        users, rows = rebuild_summary(db, course_ids=sorted(retimed_course_ids))
+        print(f"✓ Rebuilt course progress of {users} user(s) after video_duration changes ({rows} summary row(s))")
     if test_course:
         print("✓ Updated/created free test course 'Fortnite Test Course' with 4 lessons and resources")
 
@@ -0,0 +1,44 @@
+"""
+Rebuild user_course_progress from the raw progress table.
+
+The summary is kept up to date on every progress write, but it stores
+watched time capped by the video_duration known at write time. Run this after
+changing lesson durations (see verify_video_durations.py), after moving lessons
+between courses, or after running with PROGRESS_SUMMARY_ENABLED=false.
+
+Run: python scripts/rebuild_progress_summary.py [--batch-size 500] [--course-id N ...]
+
+init_db.py already does this for the courses whose durations it changes.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal
+from app.services.progress_summary import rebuild_summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500, help="Users per transaction")
+    parser.add_argument("--course-id", type=int, action="append", dest="course_ids",
+                        help="Only rebuild this course's rows (repeatable)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        rebuild_summary(
+            db,
+            course_ids=args.course_ids,
+            batch_size=args.batch_size,
+            on_batch=lambda users, rows: print(f"Rebuilt {users} user(s), {rows} summary row(s)"),
+        )
+    finally:
+        db.close()
+    print("Done.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Email an announcement to all active users.
+
+Subject and bodies are Jinja2 templates with the variables name, username and
+email. The campaign is saved under --name together with its templates and
+progress: if the run is interrupted, run the same command again (or just
+--name) to resume. Failed sends are queued in the email outbox for retries.
+
+Run: python scripts/send_announcement.py --name spring-courses --subject "New courses" \
+         --html announcement.html [--text announcement.txt] [--rate 300] [--dry-run]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from contextlib import aclosing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.smtp_pool import smtp_pool
+from app.services.announcements import (
+    CampaignError,
+    CampaignTemplates,
+    get_or_create_campaign,
+    run_campaign,
+    stream_recipients,
+)
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def _read(path):
+    if path is None:
+        return None
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+async def run(args) -> None:
+    async with AsyncSessionLocal() as db:
+        campaign = await get_or_create_campaign(
+            db, args.name, args.subject, _read(args.html), _read(args.text), persist=not args.dry_run,
+        )
+
+    if args.dry_run:
+        # Show what the first recipient would get
+        templates = CampaignTemplates(campaign.subject, campaign.html_template, campaign.text_template)
+        async with aclosing(stream_recipients(campaign.last_user_id, window=1)) as recipients:
+            async for recipient in recipients:
+                subject, html_body, text_body = templates.render(recipient)
+                print(f"To: {recipient.email}\nSubject: {subject}\n\n{text_body or html_body}\n")
+                break
+
+    try:
+        result = await run_campaign(
+            campaign,
+            concurrency=args.concurrency,
+            rate_per_minute=args.rate,
+            dry_run=args.dry_run,
+            checkpoint_every=args.checkpoint_every,
+        )
+    finally:
+        await smtp_pool.close()
+    verb = "Rendered" if args.dry_run else "Sent"
+    print(
+        f"{verb} {result.sent}, deferred to outbox {result.deferred}, checkpoint user {result.last_user_id}, "
+        f"{'completed' if result.completed else 'NOT completed (run again to resume)'} in {result.seconds:.1f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--name", required=True, help="Campaign name; reuse it to resume")
+    parser.add_argument("--subject", help="Subject template (new campaigns)")
+    parser.add_argument("--html", help="HTML body template file (new campaigns)")
+    parser.add_argument("--text", help="Plain text body template file")
+    parser.add_argument("--rate", type=int, default=settings.ANNOUNCEMENT_RATE_PER_MINUTE, help="Max emails per minute")
+    parser.add_argument("--concurrency", type=int, default=settings.SMTP_POOL_SIZE, help="Concurrent sends")
+    parser.add_argument("--checkpoint-every", type=int, default=100, help="Save progress every N users")
+    parser.add_argument("--dry-run", action="store_true", help="Render every email, send and save nothing")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run(args))
+    except CampaignError as e:
+        sys.exit(str(e))
+    except KeyboardInterrupt:
+        print("Interrupted; progress saved, run the same command to resume")
+
+
+if __name__ == "__main__":
+    main()
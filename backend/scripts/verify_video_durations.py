@@ -7,16 +7,23 @@ Run: python scripts/verify_video_durations.py
 Optional: set YOUTUBE_API_KEY in .env to fetch real durations from YouTube and report mismatches.
 Without the key, the script only lists current DB values as a reminder to keep them in sync.
 """
+import asyncio
 import os
 import re
 import sys
+from typing import Dict, List
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal
+from app.core.http_client import close_http_client, get_http_client
 from app.models.course import CourseLesson
 
+YOUTUBE_VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
+# videos.list accepts up to 50 comma-separated IDs per request
+YOUTUBE_IDS_PER_REQUEST = 50
+
 
 def extract_youtube_id(url: str):
     """Extract YouTube video ID from URL."""
@@ -34,41 +41,59 @@ def extract_youtube_id(url: str):
     return None
 
 
-def fetch_youtube_duration(api_key: str, video_id: str) -> int | None:
-    """Fetch video duration in seconds from YouTube Data API v3."""
+def parse_iso_duration(duration_iso: str) -> int:
+    """Seconds in an ISO 8601 duration (e.g. PT3M33S, PT1H2M10S)."""
+    total_seconds = 0
+    if "H" in duration_iso:
+        h = re.search(r"(\d+)H", duration_iso)
+        if h:
+            total_seconds += int(h.group(1)) * 3600
+    if "M" in duration_iso:
+        m = re.search(r"(\d+)M", duration_iso)
+        if m:
+            total_seconds += int(m.group(1)) * 60
+    if "S" in duration_iso:
+        s = re.search(r"(\d+)S", duration_iso)
+        if s:
+            total_seconds += int(s.group(1))
+    return total_seconds
+
+
+async def fetch_youtube_durations(api_key: str, video_ids: List[str]) -> Dict[str, int]:
+    """Durations in seconds by video ID from YouTube Data API v3; missing IDs are left out."""
+    client = get_http_client()
+    unique_ids = list(dict.fromkeys(video_ids))
+    batches = [unique_ids[i:i + YOUTUBE_IDS_PER_REQUEST] for i in range(0, len(unique_ids), YOUTUBE_IDS_PER_REQUEST)]
+
+    async def fetch(batch: List[str]) -> Dict[str, int]:
+        try:
+            resp = await client.get(
+                YOUTUBE_VIDEOS_URL,
+                params={"id": ",".join(batch), "part": "contentDetails", "key": api_key},
+            )
+            if resp.status_code != 200:
+                return {}
+            durations = {}
+            for item in resp.json().get("items", []):
+                duration_iso = item.get("contentDetails", {}).get("duration", "")
+                if duration_iso:
+                    durations[item["id"]] = parse_iso_duration(duration_iso)
+            return durations
+        except Exception:
+            return {}
+
+    durations: Dict[str, int] = {}
+    # Batches go out concurrently over the pooled client
+    for result in await asyncio.gather(*(fetch(batch) for batch in batches)):
+        durations.update(result)
+    return durations
+
+
+async def _fetch_durations(api_key: str, video_ids: List[str]) -> Dict[str, int]:
     try:
-        import httpx
-        resp = httpx.get(
-            "https://www.googleapis.com/youtube/v3/videos",
-            params={"id": video_id, "part": "contentDetails", "key": api_key},
-            timeout=10,
-        )
-        if resp.status_code != 200:
-            return None
-        data = resp.json()
-        items = data.get("items", [])
-        if not items:
-            return None
-        duration_iso = items[0].get("contentDetails", {}).get("duration", "")
-        if not duration_iso:
-            return None
-        # Parse ISO 8601 duration (e.g. PT3M33S, PT1H2M10S)
-        total_seconds = 0
-        if "H" in duration_iso:
-            h = re.search(r"(\d+)H", duration_iso)
-            if h:
-                total_seconds += int(h.group(1)) * 3600
-        if "M" in duration_iso:
-            m = re.search(r"(\d+)M", duration_iso)
-            if m:
-                total_seconds += int(m.group(1)) * 60
-        if "S" in duration_iso:
-            s = re.search(r"(\d+)S", duration_iso)
-            if s:
-                total_seconds += int(s.group(1))
-        return total_seconds
-    except Exception:
-        return None
+        return await fetch_youtube_durations(api_key, video_ids)
+    finally:
+        await close_http_client()
 
 
 def main():
@@ -80,6 +105,10 @@ def main():
             return
 
         api_key = os.environ.get("YOUTUBE_API_KEY")
+        durations: Dict[str, int] = {}
+        if api_key:
+            video_ids = [yt_id for yt_id in (extract_youtube_id(lesson.video_url) for lesson in lessons) if yt_id]
+            durations = asyncio.run(_fetch_durations(api_key, video_ids))
         print("Lesson video_duration check (DB must match actual video length for progress to work correctly)\n")
         print(f"{'ID':<6} {'Title':<40} {'video_duration':<16} {'YouTube':<10} {'Note'}")
         print("-" * 100)
@@ -89,9 +118,7 @@ def main():
             yt_id = extract_youtube_id(lesson.video_url)
             db_dur = lesson.video_duration
             title_short = (lesson.title[:37] + "...") if len(lesson.title) > 40 else lesson.title
-            actual_seconds = None
-            if api_key and yt_id:
-                actual_seconds = fetch_youtube_duration(api_key, yt_id)
+            actual_seconds = durations.get(yt_id) if yt_id else None
 
             if actual_seconds is not None:
                 match = db_dur == actual_seconds
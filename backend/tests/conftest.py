@@ -0,0 +1,33 @@
+"""
+Run from backend/: pip install -r requirements-dev.txt && python -m pytest
+
+Tests never use DATABASE_URL (it may point at real data): app.* is imported
+against TEST_DATABASE_URL, by default a throwaway SQLite file. On Postgres
+the seeded tests drop every table, so its name must contain "bench" (see
+benchmarks.dataset), e.g.
+    TEST_DATABASE_URL=postgresql://localhost/app_bench python -m pytest
+"""
+import os
+import tempfile
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get(
+    "TEST_DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="backend-tests-"), "test.db")
+)
+# Before any app.* import: settings and engines are created at import time.
+# benchmarks/__init__.py (imported with benchmarks.dataset) overwrites
+# DATABASE_URL from BENCHMARK_DATABASE_URL, so set both.
+os.environ["DATABASE_URL"] = os.environ["BENCHMARK_DATABASE_URL"] = TEST_DATABASE_URL
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ENVIRONMENT", "test")
+# A new lazy load of Course.modules / CourseModule.lessons / CourseLesson.progress fails the test
+os.environ.setdefault("SQL_RAISE_ON_LAZY_LOAD", "true")
+
+
+@pytest.fixture(scope="session")
+def seeded_dataset():
+    """The synthetic benchmark dataset (benchmarks.dataset) in the test database, re-created once per run."""
+    from app.core.database import engine
+    from benchmarks.dataset import DatasetSpec, seed_dataset
+    return seed_dataset(engine, DatasetSpec(users=200, courses=10))
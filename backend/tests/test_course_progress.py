@@ -0,0 +1,141 @@
+"""
+compute_course_progress (one aggregate query) against the Python loop it
+replaced, on randomized courses and progress.
+"""
+import asyncio
+import random
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.core.database import Base
+from app.models import Course, CourseLesson, CourseModule, Progress, User
+from app.services.progress import compute_all_course_progress, compute_course_progress
+
+USER_ID, OTHER_USER_ID = 1, 2
+
+
+def legacy_course_progress(course_id, lessons, progress_by_lesson):
+    """The loop account.get_course_progress used before the aggregate query."""
+    if course_id not in lessons:
+        return {
+            "course_id": course_id,
+            "total_lessons": 0,
+            "completed_lessons": 0,
+            "total_duration": 0,
+            "watched_duration": 0,
+            "progress_percentage": 0.0
+        }
+    all_lessons = lessons[course_id]
+    total_lessons = len(all_lessons)
+    total_duration = sum(lesson["video_duration"] or 0 for lesson in all_lessons)
+    completed_lessons = 0
+    watched_duration = 0
+    for lesson in all_lessons:
+        progress = progress_by_lesson.get(lesson["id"])
+        if progress:
+            effective = progress["watched_duration"]
+            if lesson["video_duration"] and effective > lesson["video_duration"]:
+                effective = lesson["video_duration"]
+            watched_duration += effective
+            if lesson["video_duration"] and effective >= (lesson["video_duration"] * 0.9):
+                completed_lessons += 1
+    progress_percentage = (watched_duration / total_duration * 100) if total_duration > 0 else 0.0
+    progress_percentage = min(100.0, progress_percentage)
+    return {
+        "course_id": course_id,
+        "total_lessons": total_lessons,
+        "completed_lessons": completed_lessons,
+        "total_duration": total_duration,
+        "watched_duration": watched_duration,
+        "progress_percentage": round(progress_percentage, 2),
+    }
+
+
+def _random_watched(rnd: random.Random, duration):
+    """Below, at and past the 90% boundary and past the end; anything for unknown durations."""
+    if not duration:
+        return rnd.randint(0, 5000)
+    boundary = -(-9 * duration // 10)  # first second that counts as completed
+    return rnd.choice([
+        0,
+        rnd.randint(0, duration),
+        boundary - 1,
+        boundary,
+        duration,
+        duration + rnd.randint(1, 3000),
+    ])
+
+
+def _seed(sync_url: str, seed: int):
+    """Random courses for USER_ID; returns (course_id -> lessons, lesson_id -> USER_ID's progress)."""
+    rnd = random.Random(seed)
+    courses, modules, lesson_rows, progress_rows = [], [], [], []
+    lessons, progress_by_lesson = {}, {}
+    for course_id in range(1, 9):
+        courses.append({"id": course_id, "title": f"Course {course_id}", "price": 0.0, "is_active": rnd.random() < 0.8})
+        for _ in range(rnd.randint(0, 3)):
+            module_id = len(modules) + 1
+            modules.append({"id": module_id, "course_id": course_id, "title": f"Module {module_id}"})
+            for _ in range(rnd.randint(0, 6)):
+                lesson = {
+                    "id": len(lesson_rows) + 1,
+                    "module_id": module_id,
+                    "title": "Lesson",
+                    "video_url": "https://youtu.be/x",
+                    "video_duration": rnd.choice([None, 0, rnd.randint(1, 20), rnd.randint(60, 3600), 10 * rnd.randint(1, 360)]),
+                }
+                lesson_rows.append(lesson)
+                lessons.setdefault(course_id, []).append(lesson)
+                for user_id in (USER_ID, OTHER_USER_ID):
+                    if rnd.random() < 0.6:
+                        row = {
+                            "user_id": user_id,
+                            "lesson_id": lesson["id"],
+                            "watched_duration": _random_watched(rnd, lesson["video_duration"]),
+                            "is_completed": False,
+                        }
+                        progress_rows.append(row)
+                        if user_id == USER_ID:
+                            progress_by_lesson[lesson["id"]] = row
+        # A course without modules still reports its (empty) totals
+        lessons.setdefault(course_id, [])
+
+    engine = create_engine(sync_url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"id": user_id, "email": f"user{user_id}@example.com", "username": f"user{user_id}",
+             "hashed_password": "x", "auth_provider": "email"}
+            for user_id in (USER_ID, OTHER_USER_ID)
+        ])
+        for model, rows in ((Course, courses), (CourseModule, modules), (CourseLesson, lesson_rows), (Progress, progress_rows)):
+            if rows:
+                conn.execute(insert(model), rows)
+    engine.dispose()
+    return courses, lessons, progress_by_lesson
+
+
+async def _compute(async_url: str, course_ids):
+    engine = create_async_engine(async_url)
+    try:
+        async with AsyncSession(engine) as db:
+            single = [(await compute_course_progress(db, USER_ID, course_id)).model_dump() for course_id in course_ids]
+            every = [progress.model_dump() for progress in await compute_all_course_progress(db, USER_ID)]
+        return single, every
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_matches_python_loop(tmp_path, seed):
+    path = tmp_path / "progress.db"
+    courses, lessons, progress_by_lesson = _seed(f"sqlite:///{path}", seed)
+    course_ids = [course["id"] for course in courses] + [999]  # and an unknown course
+
+    single, every = asyncio.run(_compute(f"sqlite+aiosqlite:///{path}", course_ids))
+
+    expected = {course_id: legacy_course_progress(course_id, lessons, progress_by_lesson) for course_id in course_ids}
+    assert single == [expected[course_id] for course_id in course_ids]
+    assert every == [expected[course["id"]] for course in courses if course["is_active"]]
@@ -0,0 +1,68 @@
+"""
+Who gets to see /health/db pool details and /metrics.
+"""
+import asyncio
+
+import httpx
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.main import app
+
+
+async def _get(path: str, token: str = None) -> httpx.Response:
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+    finally:
+        await async_engine.dispose()
+
+
+def test_health_db_hides_pool_without_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scraper-token")
+
+    anonymous = asyncio.run(_get("/health/db"))
+    assert anonymous.status_code == 200
+    assert anonymous.json() == {"status": "up"}
+
+    wrong = asyncio.run(_get("/health/db", token="guess"))
+    assert wrong.json() == {"status": "up"}
+
+    scraper = asyncio.run(_get("/health/db", token="scraper-token"))
+    assert scraper.json()["status"] == "up"
+    assert "wait_seconds" in scraper.json()
+
+
+def test_metrics_requires_token_when_configured(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scraper-token")
+
+    assert asyncio.run(_get("/metrics")).status_code == 401
+    scraper = asyncio.run(_get("/metrics", token="scraper-token"))
+    assert scraper.status_code == 200
+    assert "http_requests_total" in scraper.text
+
+
+def test_metrics_refused_in_production_without_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+    monkeypatch.setattr(settings, "ENVIRONMENT", "production")
+
+    assert asyncio.run(_get("/metrics")).status_code == 404
+    assert asyncio.run(_get("/health/db")).json() == {"status": "up"}
+
+    monkeypatch.setattr(settings, "ENVIRONMENT", "development")
+    assert asyncio.run(_get("/metrics")).status_code == 200
+
+
+def test_in_flight_gauge_is_labelled_by_route(monkeypatch):
+    from app.core import request_metrics
+
+    seen = []
+    # dec() goes through inc() with a negative amount
+    monkeypatch.setattr(request_metrics.http_requests_in_flight, "inc",
+                        lambda amount=1, **labels: seen.append((amount, labels)))
+    asyncio.run(_get("/api/v1/courses/12345"))
+    asyncio.run(_get("/no/such/path"))
+    course = {"method": "GET", "route": "/api/v1/courses/{course_id}"}
+    unmatched = {"method": "GET", "route": "unmatched"}
+    assert seen == [(1, course), (-1, course), (1, unmatched), (-1, unmatched)]
@@ -0,0 +1,152 @@
+"""
+user_course_progress, maintained by deltas on every progress write, against
+a rebuild from raw progress (summary_rebuild_select) after random heartbeats
+through the single and batch endpoints, directly and via the write-behind
+buffer.
+"""
+import asyncio
+import random
+
+import httpx
+import pytest
+from sqlalchemy import func, select, update
+
+from app.api.v1 import progress as progress_api
+from app.core.config import settings
+from app.core.database import SessionLocal, async_engine, engine
+from app.main import app
+from app.models import CourseLesson, CourseModule, UserCourseProgress
+from app.services.progress_buffer import ProgressBuffer
+from app.services.progress_summary import rebuild_summary, summary_rebuild_select
+from benchmarks.dataset import user_email
+
+USERS = (11, 12, 13)
+COURSES = (1, 2, 3)
+
+
+def _lessons():
+    """lesson_id -> video_duration for the lessons of COURSES."""
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(CourseLesson.id, CourseLesson.video_duration)
+            .join(CourseModule, CourseModule.id == CourseLesson.module_id)
+            .where(CourseModule.course_id.in_(COURSES))
+        )
+        return dict(rows.all())
+
+
+def _watched(rnd: random.Random, duration):
+    """Around the 90% threshold, past the end, or back to something lower (a seek)."""
+    if not duration:
+        return rnd.randint(0, 2000)
+    boundary = -(-9 * duration // 10)
+    return rnd.choice([0, rnd.randint(0, duration), boundary - 1, boundary, duration, duration + rnd.randint(1, 600)])
+
+
+async def _heartbeats(seed: int, buffer) -> None:
+    rnd = random.Random(seed)
+    lessons = _lessons()
+    lesson_ids = sorted(lessons)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        headers = {}
+        for user_id in USERS:
+            login = await client.post("/api/v1/auth/login", json={"email": user_email(user_id), "password": "benchmark"})
+            assert login.status_code == 200, login.text
+            headers[user_id] = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        for step in range(300):
+            auth = headers[rnd.choice(USERS)]
+            if rnd.random() < 0.6:
+                lesson_id = rnd.choice(lesson_ids)
+                response = await client.post("/api/v1/progress/update", headers=auth, json={
+                    "lesson_id": lesson_id,
+                    "watched_duration": _watched(rnd, lessons[lesson_id]),
+                    "is_completed": rnd.random() < 0.1,
+                })
+            else:
+                items = [
+                    {"lesson_id": lesson_id, "watched_duration": _watched(rnd, lessons[lesson_id])}
+                    # Repeats within a batch too
+                    for lesson_id in rnd.choices(lesson_ids, k=rnd.randint(1, 8))
+                ]
+                response = await client.post("/api/v1/progress/batch", headers=auth, json={"items": items})
+            assert response.status_code == 200, response.text
+            if buffer is not None and step % 25 == 0:
+                await buffer.flush()
+        if buffer is not None:
+            await buffer.flush()
+
+        # The endpoints read the summary (when enabled) or aggregate raw progress; both must agree
+        for user_id in USERS:
+            responses = {}
+            for summary in (True, False):
+                settings.PROGRESS_SUMMARY_ENABLED = summary
+                response = await client.get("/api/v1/account/progress", headers=headers[user_id])
+                assert response.status_code == 200, response.text
+                responses[summary] = response.json()
+            assert responses[True] == responses[False]
+    await async_engine.dispose()
+
+
+@pytest.mark.parametrize("write_behind", [False, True], ids=["direct", "write_behind"])
+def test_summary_matches_rebuild(seeded_dataset, monkeypatch, write_behind):
+    monkeypatch.setattr(settings, "PROGRESS_SUMMARY_ENABLED", True)
+    monkeypatch.setattr(settings, "PROGRESS_WRITE_BEHIND", write_behind)
+    buffer = None
+    if write_behind:
+        # Flushed by the test, not a background task
+        buffer = ProgressBuffer(flush_interval=3600, max_dirty=10 ** 6, max_entries=10 ** 6)
+        monkeypatch.setattr(progress_api, "progress_buffer", buffer)
+
+    asyncio.run(_heartbeats(seed=int(write_behind), buffer=buffer))
+
+    with engine.connect() as conn:
+        rebuilt = {
+            (user_id, course_id): (int(watched), int(completed))
+            for user_id, course_id, watched, completed, _ in conn.execute(
+                summary_rebuild_select(engine.dialect.name, list(USERS))
+            )
+        }
+        summary = {
+            (row.user_id, row.course_id): (row.watched_duration, row.completed_lessons)
+            for row in conn.execute(select(UserCourseProgress).where(UserCourseProgress.user_id.in_(USERS)))
+        }
+    assert summary == rebuilt
+
+
+def _summary_rows(conn, course_ids=None):
+    stmt = select(UserCourseProgress.user_id, UserCourseProgress.course_id,
+                  UserCourseProgress.watched_duration, UserCourseProgress.completed_lessons)
+    if course_ids is not None:
+        stmt = stmt.where(UserCourseProgress.course_id.in_(course_ids))
+    return {(user_id, course_id): (watched, completed) for user_id, course_id, watched, completed in conn.execute(stmt)}
+
+
+def test_rebuild_summary_after_duration_change(seeded_dataset):
+    course_id = 4
+    with engine.begin() as conn:
+        other_courses = _summary_rows(conn, [c for c in range(1, seeded_dataset["courses"] + 1) if c != course_id])
+        # What init_db.py does on deploy: shorten every lesson of one course
+        lesson_ids = select(CourseLesson.id).join(CourseModule).where(CourseModule.course_id == course_id)
+        conn.execute(
+            update(CourseLesson).where(CourseLesson.id.in_(lesson_ids.scalar_subquery()))
+            .values(video_duration=func.coalesce(CourseLesson.video_duration, 600) // 2)
+        )
+        stale = _summary_rows(conn, [course_id])
+
+    with SessionLocal() as db:
+        users, rows = rebuild_summary(db, course_ids=[course_id], batch_size=50)
+
+    with engine.connect() as conn:
+        rebuilt = _summary_rows(conn, [course_id])
+        user_ids = sorted({user_id for user_id, _ in rebuilt})
+        expected = {
+            (user_id, course): (int(watched), int(completed))
+            for user_id, course, watched, completed, _ in conn.execute(
+                summary_rebuild_select(engine.dialect.name, user_ids, [course_id])
+            )
+        }
+        assert rebuilt == expected != stale
+        assert (users, rows) == (len(user_ids), len(rebuilt))
+        # Other courses' rows are left alone
+        assert _summary_rows(conn, list({course for _, course in other_courses})) == other_courses
@@ -0,0 +1,162 @@
+"""
+Query-plan regression check for the hot API paths.
+
+Drives the routers in-process over the seeded dataset with the caches that
+would hide queries turned off, captures every statement they send to the
+database and runs EXPLAIN on each one. Fails when a plan has to filter a
+large table with a sequential scan, i.e. no index can serve the query.
+
+Plans on SQLite only show whether an index exists at all; run against
+Postgres (what production uses) with TEST_DATABASE_URL, see conftest.py.
+"""
+import asyncio
+import json
+import re
+from typing import Any, Dict, List, Tuple
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.core.security import password_hasher
+from app.main import app
+from benchmarks.dataset import user_email
+
+# Tables that grow with users/content; a seq scan on them must not be used
+# to find a handful of rows
+LARGE_TABLES = {
+    "course_modules", "course_lessons", "course_resources", "progress",
+    "user_course_progress", "users", "password_reset_tokens",
+}
+
+Statement = Tuple[str, Any]
+
+
+class StatementRecorder:
+    def __init__(self):
+        self.statements: Dict[str, Statement] = {}
+        self.route = ""
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if executemany or not re.match(r"\s*(SELECT|WITH|UPDATE|DELETE|INSERT)\b", statement, re.I):
+            return
+        self.statements.setdefault(statement, (self.route, parameters))
+
+
+async def drive_routes(recorder: StatementRecorder) -> None:
+    course_id, lesson_ids = 1, [1, 2, 3]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        async def call(method: str, path: str, **kwargs) -> httpx.Response:
+            recorder.route = f"{method} {path}"
+            response = await client.request(method, path, **kwargs)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{method} {path} -> {response.status_code}: {response.text[:200]}")
+            return response
+
+        login = await call("POST", "/api/v1/auth/login", json={"email": user_email(1), "password": "benchmark"})
+        auth = {"Authorization": f"Bearer {login.json()['access_token']}"}
+        await call("GET", "/api/v1/auth/me", headers=auth)
+        await call("GET", "/api/v1/courses/")
+        await call("GET", f"/api/v1/courses/{course_id}", headers=auth)
+        await call("GET", f"/api/v1/resources/course/{course_id}", headers=auth)
+        await call("GET", f"/api/v1/progress/lesson/{lesson_ids[0]}", headers=auth)
+        await call("POST", "/api/v1/progress/update", headers=auth,
+                   json={"lesson_id": lesson_ids[0], "watched_duration": 30})
+        await call("POST", "/api/v1/progress/batch", headers=auth,
+                   json={"items": [{"lesson_id": lesson_id, "watched_duration": 45} for lesson_id in lesson_ids]})
+        for summary in (True, False):
+            settings.PROGRESS_SUMMARY_ENABLED = summary
+            await call("GET", "/api/v1/account/progress", headers=auth)
+            await call("GET", f"/api/v1/account/progress/{course_id}", headers=auth)
+        await call("POST", "/api/v1/auth/forgot-password", json={"email": user_email(1)})
+        if async_engine.dialect.name == "postgresql":
+            # SQLite returns naive datetimes, which reset_password can't compare
+            await call("POST", "/api/v1/auth/reset-password", json={"token": "bench-token-1", "new_password": "benchmark"})
+
+
+def _walk(plan: Dict[str, Any]):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+async def explain_postgres(conn, statement: str, parameters) -> Tuple[List[str], str]:
+    # With seq scans disabled the planner picks any usable index regardless of
+    # table size, so a filtered Seq Scan left in the plan means there is none
+    await conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    result = await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + statement, parameters)
+    plan = result.scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    problems = [
+        f"Seq Scan on {node['Relation Name']} (Filter: {node['Filter']})"
+        for node in _walk(plan[0]["Plan"])
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES and "Filter" in node
+    ]
+    return problems, json.dumps(plan[0]["Plan"], indent=1)
+
+
+async def explain_sqlite(conn, statement: str, parameters) -> Tuple[List[str], str]:
+    rows = (await conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)).all()
+    problems = []
+    for row in rows:
+        match = re.match(r"SCAN (\w+)(?: AS \w+)?$", row[-1])
+        if match and match.group(1) in LARGE_TABLES:
+            problems.append(row[-1])
+    return problems, "\n".join(row[-1] for row in rows)
+
+
+async def explain_all(statements: Dict[str, Statement]) -> List[str]:
+    """One report entry (route, statement, problems, plan) per statement with a seq scan."""
+    explain = explain_postgres if async_engine.dialect.name == "postgresql" else explain_sqlite
+    failures = []
+    async with async_engine.connect() as conn:
+        for statement, (route, parameters) in statements.items():
+            # Lock-taking statements (advisory lock, SQLite's no-op UPDATE ... WHERE 0)
+            if "pg_advisory_xact_lock" in statement or re.search(r"WHERE (0 = 1|false)$", statement.strip()):
+                continue
+            problems, plan = await explain(conn, statement, parameters)
+            if problems:
+                failures.append("\n".join([f"{route}: {' '.join(statement.split())}", *problems, plan]))
+        await conn.rollback()
+    await async_engine.dispose()
+    return failures
+
+
+async def _capture() -> Dict[str, Statement]:
+    recorder = StatementRecorder()
+    event.listen(async_engine.sync_engine, "before_cursor_execute", recorder)
+    try:
+        await drive_routes(recorder)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", recorder)
+        # Pooled connections belong to this event loop
+        await async_engine.dispose()
+    return recorder.statements
+
+
+@pytest.fixture(scope="module")
+def captured_statements(seeded_dataset):
+    with pytest.MonkeyPatch.context() as patch:
+        # Every request must reach the database for its queries to be captured
+        patch.setattr(settings, "COURSE_CACHE_ENABLED", False)
+        patch.setattr(settings, "PRINCIPAL_CACHE_ENABLED", False)
+        patch.setattr(settings, "ACCESS_TOKEN_EMBED_PROFILE", False)
+        patch.setattr(settings, "PROGRESS_WRITE_BEHIND", False)
+        patch.setattr(settings, "PROGRESS_SUMMARY_ENABLED", settings.PROGRESS_SUMMARY_ENABLED)
+        try:
+            yield asyncio.run(_capture())
+        finally:
+            password_hasher.shutdown()
+
+
+def test_hot_routes_reach_the_large_tables(captured_statements):
+    sql = " ".join(captured_statements).lower()
+    for table in ("progress", "course_lessons", "course_modules", "course_resources", "password_reset_tokens"):
+        assert re.search(rf"\b{table}\b", sql), f"no captured statement touches {table}"
+
+
+def test_no_sequential_scans_on_large_tables(captured_statements):
+    failures = asyncio.run(explain_all(captured_statements))
+    assert not failures, "sequential scans on large tables:\n\n" + "\n\n".join(failures)